@@ -1,19 +1,47 @@
 from django.contrib import admin
 
-from .models import CineRequest
-from .views import send_cine_request_fulfilled_mail
+from cinecraze_server.pagination import EstimatedCountPaginator
+
+from .fulfilment import fulfil_demand, queue_cine_request_fulfilled_mail
+from .models import CineDemand, CineRequest
 
 
 class CineRequestAdmin(admin.ModelAdmin):
-    list_display = ("name", "email", "message", "created_at", "solved")
+    list_display = ("name", "email", "title", "message", "created_at", "solved")
     list_filter = ("solved",)
-    search_fields = ("name", "email", "created_at", "message")
+    search_fields = ("name", "email", "created_at", "message", "title")
+    readonly_fields = ("title_key", "demand")
+    ordering = ("-created_at", "-id")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     def save_model(self, request, obj, form, change):
         if change and "solved" in form.changed_data and obj.solved:
-            # Send email notification
-            send_cine_request_fulfilled_mail(obj)
+            # Queue the email notification; it is sent once the change commits
+            queue_cine_request_fulfilled_mail(obj)
         super().save_model(request, obj, form, change)
+        if change and "solved" in form.changed_data:
+            CineDemand.update_counts([obj.demand_id])
+
+
+class CineDemandAdmin(admin.ModelAdmin):
+    list_display = (
+        "title",
+        "tmdb_id",
+        "open_requests",
+        "total_requests",
+        "last_requested_at",
+    )
+    search_fields = ("title", "title_key")
+    ordering = ("-open_requests", "-last_requested_at")
+    readonly_fields = ("title_key", "open_requests", "total_requests")
+    actions = ["fulfil"]
+
+    @admin.action(description="Fulfil all open requests")
+    def fulfil(self, request, queryset):
+        fulfilled = sum(fulfil_demand(demand) for demand in queryset)
+        self.message_user(request, f"{fulfilled} requests marked as solved.")
 
 
 admin.site.register(CineRequest, CineRequestAdmin)
+admin.site.register(CineDemand, CineDemandAdmin)
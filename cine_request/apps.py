@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CineRequestConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cine_request'
+
+    def ready(self):
+        from . import signals  # noqa: F401
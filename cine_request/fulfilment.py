@@ -0,0 +1,70 @@
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from cinecraze_server.text import normalize_title
+from outbox.mail import enqueue_email, enqueue_emails
+
+from .models import CineDemand, CineRequest
+
+
+def cine_request_fulfilled_mail(name, email):
+    """
+    Returns the notification email for a fulfilled request, as the keyword
+    arguments of enqueue_email. The outbox sender renders the template.
+    """
+    return {
+        "subject": "Your Cine Request has been Fulfilled",
+        "to": [email],
+        "template": "cine_request/request_fulfilled.html",
+        "context": {"cine_request": {"name": name}},
+    }
+
+
+def queue_cine_request_fulfilled_mail(cine_request):
+    enqueue_email(**cine_request_fulfilled_mail(cine_request.name, cine_request.email))
+
+
+def fulfil_requests(queryset):
+    """
+    Marks every open request in the queryset as solved with a single UPDATE
+    and queues their notification emails with a single INSERT, in one
+    transaction. Only the columns the emails need are read; nothing is
+    rendered here. Returns the number of requests fulfilled.
+    """
+    with transaction.atomic():
+        rows = list(
+            queryset.filter(solved=False)
+            .select_for_update()
+            .values_list("id", "name", "email", "demand_id")
+        )
+        if not rows:
+            return 0
+        CineRequest.objects.filter(pk__in=[row[0] for row in rows]).update(
+            solved=True, modified_at=timezone.now()
+        )
+        enqueue_emails(
+            cine_request_fulfilled_mail(name, email) for _, name, email, _ in rows
+        )
+        CineDemand.update_counts({row[3] for row in rows})
+    return len(rows)
+
+
+def fulfil_demand(demand):
+    return fulfil_requests(demand.requests.all())
+
+
+def fulfil_requests_for_movies(movies):
+    """
+    Fulfils the open requests naming any of the given movies, matched on
+    tmdb_id or on the normalized title through their indexes.
+    """
+    tmdb_ids = {movie.tmdb_id for movie in movies}
+    title_keys = {normalize_title(movie.title) for movie in movies} - {""}
+    if not tmdb_ids:
+        return 0
+    return fulfil_requests(
+        CineRequest.objects.filter(
+            Q(tmdb_id__in=tmdb_ids) | Q(title_key__in=title_keys), solved=False
+        )
+    )
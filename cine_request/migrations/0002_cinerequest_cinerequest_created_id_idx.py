@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cine_request", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cinerequest",
+            index=models.Index(
+                fields=["created_at", "id"], name="cinerequest_created_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cine_request", "0002_cinerequest_cinerequest_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cinerequest",
+            name="modified_at",
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
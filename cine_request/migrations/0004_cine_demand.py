@@ -0,0 +1,68 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cine_request", "0003_cinerequest_modified_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cinerequest",
+            name="title",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="cinerequest",
+            name="title_key",
+            field=models.CharField(blank=True, db_index=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="cinerequest",
+            name="tmdb_id",
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="CineDemand",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("title", models.CharField(max_length=255)),
+                ("title_key", models.CharField(max_length=255, unique=True)),
+                ("tmdb_id", models.IntegerField(blank=True, null=True, unique=True)),
+                ("open_requests", models.PositiveIntegerField(default=0)),
+                ("total_requests", models.PositiveIntegerField(default=0)),
+                ("last_requested_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-open_requests", "-last_requested_at"],
+                        name="cinedemand_open_requests_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name="cinerequest",
+            name="demand",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="requests",
+                to="cine_request.cinedemand",
+            ),
+        ),
+    ]
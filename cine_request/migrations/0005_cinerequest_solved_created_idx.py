@@ -0,0 +1,20 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cine_request", "0004_cine_demand"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cinerequest",
+            index=models.Index(
+                fields=["solved", "created_at", "id"],
+                name="cinerequest_solved_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,77 @@
+import unicodedata
+
+from django.db import migrations
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def normalize_title(title):
+    title = unicodedata.normalize("NFKD", title or "")
+    title = "".join(
+        char if char.isalnum() else " "
+        for char in title
+        if not unicodedata.combining(char)
+    )
+    return " ".join(title.casefold().split())
+
+
+def backfill_cine_demand(apps, schema_editor):
+    CineRequest = apps.get_model("cine_request", "CineRequest")
+    CineDemand = apps.get_model("cine_request", "CineDemand")
+    by_key = {demand.title_key: demand for demand in CineDemand.objects.all()}
+    by_tmdb_id = {
+        demand.tmdb_id: demand for demand in by_key.values() if demand.tmdb_id
+    }
+
+    pending = []
+    requests = CineRequest.objects.filter(demand__isnull=True).order_by("id")
+    for cine_request in requests.iterator(chunk_size=1000):
+        cine_request.title_key = normalize_title(
+            cine_request.title or cine_request.message
+        )[:255]
+        demand = by_tmdb_id.get(cine_request.tmdb_id)
+        if demand is None and cine_request.title_key:
+            demand = by_key.get(cine_request.title_key)
+            if demand is None:
+                demand = by_key[cine_request.title_key] = CineDemand.objects.create(
+                    title_key=cine_request.title_key,
+                    title=(cine_request.title or cine_request.message)[:255],
+                    tmdb_id=cine_request.tmdb_id,
+                )
+            if demand.tmdb_id is None and cine_request.tmdb_id is not None:
+                demand.tmdb_id = cine_request.tmdb_id
+                demand.save(update_fields=["tmdb_id"])
+            if demand.tmdb_id is not None:
+                by_tmdb_id[demand.tmdb_id] = demand
+        cine_request.demand = demand
+        pending.append(cine_request)
+        if len(pending) >= 1000:
+            CineRequest.objects.bulk_update(pending, ["title_key", "demand"])
+            pending = []
+    CineRequest.objects.bulk_update(pending, ["title_key", "demand"])
+
+    counts = (
+        CineRequest.objects.filter(demand=OuterRef("pk"))
+        .values("demand")
+        .annotate(
+            open_requests=Count("id", filter=Q(solved=False)),
+            total_requests=Count("id"),
+            last_requested_at=Max("created_at"),
+        )
+    )
+    CineDemand.objects.update(
+        open_requests=Coalesce(Subquery(counts.values("open_requests")), 0),
+        total_requests=Coalesce(Subquery(counts.values("total_requests")), 0),
+        last_requested_at=Subquery(counts.values("last_requested_at")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cine_request", "0005_cinerequest_solved_created_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_cine_demand, migrations.RunPython.noop),
+    ]
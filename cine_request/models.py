@@ -1,12 +1,117 @@
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from cinecraze_server.text import normalize_title
+
+
+class CineDemand(models.Model):
+    """
+    Requests for the same title grouped together, keyed by the normalized
+    title, or by tmdb_id when the requester gave one, with their counts.
+    """
+
+    title = models.CharField(max_length=255)
+    title_key = models.CharField(max_length=255, unique=True)
+    tmdb_id = models.IntegerField(null=True, blank=True, unique=True)
+    open_requests = models.PositiveIntegerField(default=0)
+    total_requests = models.PositiveIntegerField(default=0)
+    last_requested_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["-open_requests", "-last_requested_at"],
+                name="cinedemand_open_requests_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    @classmethod
+    def for_request(cls, cine_request):
+        """
+        Returns the demand a new request belongs to, creating it if needed,
+        or None when the request names no usable title.
+        """
+        if cine_request.tmdb_id is not None:
+            demand = cls.objects.filter(tmdb_id=cine_request.tmdb_id).first()
+            if demand is not None:
+                return demand
+        if not cine_request.title_key:
+            return None
+        demand, _ = cls.objects.get_or_create(
+            title_key=cine_request.title_key,
+            defaults={
+                "title": (cine_request.title or cine_request.message)[:255],
+                "tmdb_id": cine_request.tmdb_id,
+            },
+        )
+        if demand.tmdb_id is None and cine_request.tmdb_id is not None:
+            cls.objects.filter(pk=demand.pk).update(tmdb_id=cine_request.tmdb_id)
+        return demand
+
+    @classmethod
+    def update_counts(cls, demand_ids):
+        """
+        Recounts the open requests of the given demands in one UPDATE.
+        """
+        open_requests = (
+            CineRequest.objects.filter(demand=OuterRef("pk"), solved=False)
+            .values("demand")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        cls.objects.filter(pk__in=[pk for pk in demand_ids if pk]).update(
+            open_requests=Coalesce(Subquery(open_requests), 0)
+        )
 
 
 class CineRequest(models.Model):
     name = models.CharField(max_length=100)
     email = models.EmailField()
     message = models.TextField()
+    # The requested title and, when known, its TMDB id.
+    title = models.CharField(max_length=255, blank=True)
+    tmdb_id = models.IntegerField(null=True, blank=True, db_index=True)
+    # normalize_title() of the title, or of the message without one.
+    title_key = models.CharField(max_length=255, blank=True, db_index=True)
+    demand = models.ForeignKey(
+        CineDemand,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="requests",
+    )
     solved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    modified_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["created_at", "id"], name="cinerequest_created_id_idx"
+            ),
+            models.Index(
+                fields=["solved", "created_at", "id"],
+                name="cinerequest_solved_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if adding:
+            self.title_key = normalize_title(self.title or self.message)[:255]
+            if self.demand_id is None:
+                self.demand = CineDemand.for_request(self)
+        super().save(*args, **kwargs)
+        if adding and self.demand_id is not None:
+            CineDemand.objects.filter(pk=self.demand_id).update(
+                open_requests=F("open_requests") + (not self.solved),
+                total_requests=F("total_requests") + 1,
+                last_requested_at=self.created_at,
+            )
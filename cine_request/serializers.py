@@ -1,9 +1,16 @@
 from rest_framework import serializers
 
-from .models import CineRequest
+from .models import CineDemand, CineRequest
 
 
 class CineRequestSerializer(serializers.ModelSerializer):
     class Meta:
         model = CineRequest
         fields = "__all__"
+        read_only_fields = ["title_key", "demand"]
+
+
+class CineDemandSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CineDemand
+        fields = "__all__"
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.dispatch import receiver
+
+from movies_and_series.signals import catalog_changed
+
+from .fulfilment import fulfil_requests_for_movies
+
+
+@receiver(catalog_changed)
+def fulfil_requests_for_added_movies(sender, movies, created=(), **kwargs):
+    # catalog_changed is sent once the movies are committed, by add_movie and
+    # by the bulk ingest alike; only newly added movies fulfil requests.
+    # Matching requests are solved with one UPDATE and their emails queued
+    # with one INSERT, left for the outbox sender to render and send.
+    if not settings.CINE_REQUEST_AUTO_FULFIL or not created:
+        return
+    created = set(created)
+    fulfil_requests_for_movies([movie for movie in movies if movie.tmdb_id in created])
@@ -1,3 +1,122 @@
+from django.core import mail
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from outbox.models import OutboxEmail
+from user_account.models import CustomUser
+
+from .models import CineDemand, CineRequest
+
+
+class CineRequestConditionalGetTests(TestCase):
+    def test_etag_tracks_cine_request_changes(self):
+        cine_request = CineRequest.objects.create(
+            name="Ann", email="ann@example.com", message="Please add Heat"
+        )
+        client = APIClient()
+
+        etag = client.get("/api/cine-request/")["ETag"]
+        # Only the page itself is queried, never the whole table.
+        with self.assertNumQueries(1):
+            response = client.get("/api/cine-request/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        cine_request.message = "Please add Heat (1995)"
+        cine_request.save()
+        response = client.get("/api/cine-request/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response["ETag"]
+        cine_request.delete()
+        response = client.get("/api/cine-request/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class CineRequestListTests(TestCase):
+    def test_lists_open_requests_newest_first_by_default(self):
+        for message in ("Heat", "Ronin", "Alien"):
+            CineRequest.objects.create(
+                name="Ann", email="ann@example.com", message=message
+            )
+        CineRequest.objects.filter(message="Ronin").update(solved=True)
+        client = APIClient()
+
+        response = client.get("/api/cine-request/")
+        messages = [row["message"] for row in response.data["results"]]
+        self.assertEqual(messages, ["Alien", "Heat"])
+        response = client.get("/api/cine-request/?solved=true")
+        self.assertEqual(len(response.data["results"]), 1)
+        response = client.get("/api/cine-request/?solved=all")
+        self.assertEqual(len(response.data["results"]), 3)
+
+
+class MarkAsSolvedTests(TestCase):
+    def test_marks_request_solved_and_queues_email(self):
+        cine_request = CineRequest.objects.create(
+            name="Ann", email="ann@example.com", message="Please add Heat"
+        )
+        client = APIClient()
+
+        response = client.patch(f"/api/cine-request/solved/{cine_request.pk}/")
+        self.assertEqual(response.status_code, 200)
+        cine_request.refresh_from_db()
+        self.assertTrue(cine_request.solved)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.to, ["ann@example.com"])
+        self.assertEqual(len(mail.outbox), 0)
+
+        response = client.patch(f"/api/cine-request/solved/{cine_request.pk}/")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+
+
+class CineDemandTests(TestCase):
+    def request(self, email, **kwargs):
+        return CineRequest.objects.create(
+            name="Ann", email=email, message=kwargs.pop("message", "Please"), **kwargs
+        )
+
+    def test_groups_requests_by_title_key_then_tmdb_id(self):
+        first = self.request("a@example.com", title="Amélie!")
+        second = self.request("b@example.com", title="  amelie ")
+        third = self.request("c@example.com", title="Amelie (2001)", tmdb_id=194)
+        fourth = self.request("d@example.com", title="Le Fabuleux Destin", tmdb_id=194)
+        other = self.request("e@example.com", message="Heat")
+
+        self.assertEqual(first.title_key, "amelie")
+        self.assertEqual(first.demand, second.demand)
+        self.assertEqual(third.demand, fourth.demand)
+        self.assertNotEqual(first.demand, third.demand)
+        self.assertEqual(other.demand.title_key, "heat")
+        demand = CineDemand.objects.get(pk=first.demand_id)
+        self.assertEqual((demand.open_requests, demand.total_requests), (2, 2))
+        self.assertEqual(CineDemand.objects.get(tmdb_id=194).total_requests, 2)
+
+    def test_fulfil_solves_open_requests_in_bulk(self):
+        admin = CustomUser.objects.create_superuser(
+            name="Admin", email="admin@example.com", password="secret"
+        )
+        for i in range(3):
+            self.request(f"user{i}@example.com", title="Heat")
+        solved = self.request("solved@example.com", title="Heat", solved=True)
+        demand = solved.demand
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        response = client.get("/api/cine-demand/")
+        self.assertEqual(response.data["results"][0]["open_requests"], 3)
+        with self.assertNumQueries(7):
+            response = client.post(f"/api/cine-demand/{demand.pk}/fulfil/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["fulfilled"], 3)
+        self.assertFalse(demand.requests.filter(solved=False).exists())
+        self.assertEqual(
+            sorted(email.to[0] for email in OutboxEmail.objects.all()),
+            ["user0@example.com", "user1@example.com", "user2@example.com"],
+        )
+        demand.refresh_from_db()
+        self.assertEqual((demand.open_requests, demand.total_requests), (0, 4))
+
+        response = client.post(f"/api/cine-demand/{demand.pk}/fulfil/")
+        self.assertEqual(response.data["fulfilled"], 0)
+        self.assertEqual(OutboxEmail.objects.count(), 3)
@@ -1,21 +1,112 @@
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
 from django.shortcuts import get_object_or_404
-from django.template.loader import render_to_string
 from rest_framework import status, viewsets
-
-# from rest_framework.permissions import IsAdminUser
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import CineRequest
-from .serializers import CineRequestSerializer
+from cinecraze_server.conditional import ConditionalGetMixin, make_etag
+from cinecraze_server.throttling import AccountThrottle, IPThrottle
+
+from .fulfilment import fulfil_demand, queue_cine_request_fulfilled_mail
+from .models import CineDemand, CineRequest
+from .serializers import CineDemandSerializer, CineRequestSerializer
 
 
-class CineRequestViewSet(viewsets.ModelViewSet):
+class CineRequestViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = CineRequest.objects.all()
     serializer_class = CineRequestSerializer
+    ordering = ("-created_at", "-id")
+    throttle_scope = "cine_request"
+    throttle_account_field = "email"
+
+    def get_queryset(self):
+        """
+        Lists open requests by default, newest first along the (solved,
+        created_at) index. Pass ?solved=true for solved requests or
+        ?solved=all for every request.
+        """
+        queryset = super().get_queryset()
+        if self.action != "list":
+            return queryset
+        solved = self.request.query_params.get("solved", "false").lower()
+        if solved == "all":
+            return queryset
+        return queryset.filter(solved=solved in ("true", "1"))
+
+    def get_authenticators(self):
+        # Submitting is anonymous. Skipping authentication keeps a Basic auth
+        # header from hashing a password before the throttles run.
+        if self.action_map.get(self.request.method.lower()) == "create":
+            return []
+        return super().get_authenticators()
+
+    def get_throttles(self):
+        # Only submitting requests is public and throttled.
+        if self.action == "create":
+            return [IPThrottle(), AccountThrottle()]
+        return super().get_throttles()
+
+    def list(self, request, *args, **kwargs):
+        # Validators come from the page being served, a bounded index range
+        # scan, rather than from an aggregate over the whole queryset.
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        return self.conditional_response(self.page_response, request, page=page)
+
+    def page_response(self, request, page):
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def get_validators(self, request, *args, page=None, **kwargs):
+        if page is not None:
+            # Rows leaving the page change its ids without changing any
+            # modification time, so lists are validated by ETag only.
+            etag = make_etag(
+                request.get_full_path(),
+                request.accepted_renderer.format,
+                [(row.pk, row.modified_at.isoformat()) for row in page],
+                self.paginator.has_next,
+                self.paginator.has_previous,
+            )
+            return etag, None
+        modified_at = (
+            self.get_queryset()
+            .filter(pk=kwargs["pk"])
+            .values_list("modified_at", flat=True)
+            .first()
+        )
+        etag = make_etag(
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            modified_at and modified_at.isoformat(),
+        )
+        return etag, modified_at and modified_at.timestamp()
+
+
+class CineDemandViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Requests grouped per title, most wanted first. Fulfilling a demand
+    solves all of its open requests at once.
+    """
+
+    queryset = CineDemand.objects.all()
+    serializer_class = CineDemandSerializer
+    permission_classes = [IsAdminUser]
+    ordering = ("-open_requests", "-last_requested_at", "-id")
+
+    @action(detail=True, methods=["post"])
+    def fulfil(self, request, pk=None):
+        fulfilled = fulfil_demand(self.get_object())
+        return Response(
+            {
+                "message": f"{fulfilled} requests marked as solved and emails queued.",
+                "fulfilled": fulfilled,
+            },
+            status=status.HTTP_200_OK,
+        )
 
 
 class MarkAsSolvedView(APIView):
@@ -23,32 +114,25 @@ class MarkAsSolvedView(APIView):
 
     def patch(self, request, pk):
         try:
-            cine_request = get_object_or_404(CineRequest, pk=pk)
-            if cine_request.solved:
-                return Response(
-                    {"error": "Request is already marked as solved."},
-                    status=status.HTTP_400_BAD_REQUEST,
+            # The request is marked as solved and the notification queued in
+            # one transaction: either both happen or neither does.
+            with transaction.atomic():
+                cine_request = get_object_or_404(
+                    CineRequest.objects.select_for_update(), pk=pk
                 )
+                if cine_request.solved:
+                    return Response(
+                        {"error": "Request is already marked as solved."},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
 
-            cine_request.solved = True
-
-            # Save the cine_request here temporarily
-            cine_request.save()
-
-            # Send email notification
-            try:
-                send_cine_request_fulfilled_mail(cine_request)
-            except Exception as e:
-                # If email sending fails, revert the `solved` status
-                cine_request.solved = False
-                cine_request.save()
-                return Response(
-                    {"error": "An error occurred while sending email."},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
+                cine_request.solved = True
+                cine_request.save(update_fields=["solved", "modified_at"])
+                queue_cine_request_fulfilled_mail(cine_request)
+                CineDemand.update_counts([cine_request.demand_id])
 
             return Response(
-                {"message": "Request marked as solved and email sent."},
+                {"message": "Request marked as solved and email queued."},
                 status=status.HTTP_200_OK,
             )
 
@@ -60,17 +144,3 @@ class MarkAsSolvedView(APIView):
                 {"error": "An error occurred while processing the request."},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
-
-
-def send_cine_request_fulfilled_mail(cine_request):
-    email_subject = "Your Cine Request has been Fulfilled"
-    email_body = render_to_string(
-        "cine_request/request_fulfilled.html",
-        {"cine_request": cine_request},
-    )
-    try:
-        email = EmailMultiAlternatives(email_subject, "", to=[cine_request.email])
-        email.attach_alternative(email_body, "text/html")
-        email.send()
-    except Exception as e:
-        raise Exception(f"Email sending failed: {str(e)}")
@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination ordered by the view's `ordering`. Views should order on
+    indexed columns so that every page is a bounded index range scan, however
+    large the table grows. An ordering already applied by a filter backend,
+    such as relevance ordering for searches, takes precedence.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        if queryset.query.order_by:
+            return tuple(queryset.query.order_by)
+        filter_backends = getattr(view, "filter_backends", [])
+        has_ordering_filter = any(
+            hasattr(backend, "get_ordering") for backend in filter_backends
+        )
+        ordering = getattr(view, "ordering", None)
+        if ordering and not has_ordering_filter:
+            return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+        return super().get_ordering(request, queryset, view)
+
+
+def estimate_row_count(model, using="default"):
+    """
+    Returns the planner's estimate of the number of rows in the model's
+    table, or None where the database keeps no such statistic.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # reltuples is -1 until the table has been vacuumed or analyzed.
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for admin changelists of large tables. Unfiltered lists take
+    their count from the table statistics instead of running COUNT(*) once
+    the table holds more than ADMIN_ESTIMATED_COUNT_THRESHOLD rows; filtered
+    lists, and databases without statistics, are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if (
+                estimate is not None
+                and estimate > settings.ADMIN_ESTIMATED_COUNT_THRESHOLD
+            ):
+                return estimate
+        return super().count
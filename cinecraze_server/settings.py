@@ -27,6 +27,13 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = env("SECRET_KEY")
 TMDB_API_KEY = env("TMDB_API_KEY")
+TMDB_API_BASE_URL = env("TMDB_API_BASE_URL", default="https://api.themoviedb.org/3")
+TMDB_TIMEOUT = env.float("TMDB_TIMEOUT", default=5.0)
+TMDB_POOL_SIZE = env.int("TMDB_POOL_SIZE", default=10)
+TMDB_MAX_CONCURRENCY = env.int("TMDB_MAX_CONCURRENCY", default=TMDB_POOL_SIZE)
+TMDB_RATE_LIMIT = env.float("TMDB_RATE_LIMIT", default=20.0)
+TMDB_CACHE_TTL = env.int("TMDB_CACHE_TTL", default=60 * 60)
+TMDB_CACHE_MAX_ENTRIES = env.int("TMDB_CACHE_MAX_ENTRIES", default=1024)
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
@@ -86,6 +93,7 @@ INSTALLED_APPS = [
     "user_account",
     "movies_and_series",
     "cine_request",
+    "outbox",
 ]
 
 AUTH_USER_MODEL = "user_account.CustomUser"
@@ -136,14 +144,110 @@ import dj_database_url
 db_url = env("DATABASE_URL")
 DATABASES = {"default": dj_database_url.parse(db_url)}
 
+# Django REST framework
+
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "user_account.authentication.CachedTokenAuthentication",
+        "rest_framework.authentication.SessionAuthentication",
+        "rest_framework.authentication.BasicAuthentication",
+    ],
+    "DEFAULT_PAGINATION_CLASS": "cinecraze_server.pagination.KeysetPagination",
+    "PAGE_SIZE": env.int("API_PAGE_SIZE", default=20),
+    # Reverse proxies in front of the app. Client IPs are read from
+    # X-Forwarded-For only past this many trusted hops, and from REMOTE_ADDR
+    # when it is 0, so clients cannot pick their own address.
+    "NUM_PROXIES": env.int("NUM_PROXIES", default=0),
+    # Budgets of cinecraze_server.throttling, per client IP and, under
+    # "<scope>_account", per account named in the request.
+    "DEFAULT_THROTTLE_RATES": {
+        "register": "10/hour",
+        "register_account": "3/hour",
+        "login": "30/minute",
+        "login_account": "10/minute",
+        "change_password": "10/hour",
+        "change_password_account": "5/hour",
+        "cine_request": "20/hour",
+        "cine_request_account": "5/hour",
+    },
+}
+API_MAX_PAGE_SIZE = env.int("API_MAX_PAGE_SIZE", default=100)
+# Admin changelists of tables larger than this show an estimated count.
+ADMIN_ESTIMATED_COUNT_THRESHOLD = env.int(
+    "ADMIN_ESTIMATED_COUNT_THRESHOLD", default=100000
+)
+
+# Throttle counters live in this cache; point it at a shared backend (e.g.
+# CACHE_URL=redis://...) for the budgets to apply across worker processes.
+THROTTLE_CACHE_ALIAS = env("THROTTLE_CACHE_ALIAS", default="default")
+# Requests hashing passwords that a process works on at once; more are shed.
+MAX_CONCURRENT_PASSWORD_HASHING = env.int("MAX_CONCURRENT_PASSWORD_HASHING", default=4)
+
+# Tokens resolved by CachedTokenAuthentication are cached in each process.
+AUTH_TOKEN_CACHE_TTL = env.int("AUTH_TOKEN_CACHE_TTL", default=60)
+AUTH_TOKEN_CACHE_MAX_ENTRIES = env.int("AUTH_TOKEN_CACHE_MAX_ENTRIES", default=10000)
+
+# Bulk movie ingestion
+MOVIE_BULK_MAX_ENTRIES = env.int("MOVIE_BULK_MAX_ENTRIES", default=1000)
+MOVIE_BULK_BATCH_SIZE = env.int("MOVIE_BULK_BATCH_SIZE", default=200)
+MOVIE_BATCH_MAX_SIZE = env.int("MOVIE_BATCH_MAX_SIZE", default=100)
+MOVIE_SUGGEST_LIMIT = env.int("MOVIE_SUGGEST_LIMIT", default=10)
+MOVIE_SUGGEST_MAX_LIMIT = env.int("MOVIE_SUGGEST_MAX_LIMIT", default=25)
+MOVIE_SIMILAR_LIMIT = env.int("MOVIE_SIMILAR_LIMIT", default=10)
+MOVIE_SIMILAR_MAX_LIMIT = env.int("MOVIE_SIMILAR_MAX_LIMIT", default=50)
+# Number of hashed feature columns in the similarity matrix.
+MOVIE_SIMILAR_DIMENSIONS = env.int("MOVIE_SIMILAR_DIMENSIONS", default=256)
+MOVIE_EXPORT_CHUNK_SIZE = env.int("MOVIE_EXPORT_CHUNK_SIZE", default=2000)
+# Size of the writes the NDJSON export is streamed in, after its first line.
+MOVIE_EXPORT_BUFFER_BYTES = env.int("MOVIE_EXPORT_BUFFER_BYTES", default=64 * 1024)
+MOVIE_COLLECTION_SIZE = env.int("MOVIE_COLLECTION_SIZE", default=50)
+MOVIE_CHANGES_PAGE_SIZE = env.int("MOVIE_CHANGES_PAGE_SIZE", default=500)
+# Changes younger than this are held back until concurrent writes commit.
+MOVIE_CHANGES_LAG_SECONDS = env.int("MOVIE_CHANGES_LAG_SECONDS", default=5)
+MOVIE_TOMBSTONE_RETENTION_DAYS = env.int("MOVIE_TOMBSTONE_RETENTION_DAYS", default=30)
+# How often the in-process catalog indexes look for writes made by other
+# processes, in seconds.
+CATALOG_INDEX_POLL_SECONDS = env.int("CATALOG_INDEX_POLL_SECONDS", default=5)
+
+# Cache
+# e.g. CACHE_URL=filecache:///var/tmp/cinecraze or dbcache://cinecraze_cache
+# (the database cache table is created with `python manage.py createcachetable`)
+
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
+# Rendered catalog responses. Use a cache shared by all workers (file,
+# database or redis) so writes invalidate every worker. With a process-local
+# (locmem) cache, catalog responses are neither cached nor answered with 304.
+CATALOG_CACHE_ALIAS = env("CATALOG_CACHE_ALIAS", default="default")
+CATALOG_CACHE_TIMEOUT = env.int("CATALOG_CACHE_TIMEOUT", default=60 * 60)
+
+# Shared second tier for TMDB responses, used by every worker when set.
+TMDB_CACHE_ALIAS = None
+if env("TMDB_CACHE_URL", default=None):
+    CACHES["tmdb"] = env.cache("TMDB_CACHE_URL")
+    TMDB_CACHE_ALIAS = "tmdb"
+
 # EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+EMAIL_BACKEND = env(
+    "EMAIL_BACKEND", default="django.core.mail.backends.smtp.EmailBackend"
+)
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = env("MAIL_USER")
 EMAIL_HOST_PASSWORD = env("MAIL_PASSWORD")
 
+# Solve open cine requests naming a movie as soon as it is added.
+CINE_REQUEST_AUTO_FULFIL = env.bool("CINE_REQUEST_AUTO_FULFIL", default=True)
+
+# Emails are queued in the outbox and sent by the send_outbox command.
+OUTBOX_BATCH_SIZE = env.int("OUTBOX_BATCH_SIZE", default=100)
+OUTBOX_MAX_ATTEMPTS = env.int("OUTBOX_MAX_ATTEMPTS", default=5)
+# Seconds before the first retry of a failed email, doubled on every retry.
+OUTBOX_RETRY_BACKOFF = env.int("OUTBOX_RETRY_BACKOFF", default=60)
+# Seconds a sender holds a batch before other senders may take it over.
+OUTBOX_LEASE_SECONDS = env.int("OUTBOX_LEASE_SECONDS", default=300)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -0,0 +1,15 @@
+import unicodedata
+
+
+def normalize_title(title):
+    """
+    Folds a title for prefix matching: accents and punctuation are dropped,
+    case is folded and whitespace collapsed, so "Amélie!" matches "ame".
+    """
+    title = unicodedata.normalize("NFKD", title or "")
+    title = "".join(
+        char if char.isalnum() else " "
+        for char in title
+        if not unicodedata.combining(char)
+    )
+    return " ".join(title.casefold().split())
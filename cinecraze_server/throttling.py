@@ -0,0 +1,160 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+_rejections = Counter()
+_rejections_lock = threading.Lock()
+
+
+def record_rejection(scope):
+    with _rejections_lock:
+        _rejections[scope] += 1
+
+
+def throttle_stats():
+    """
+    Returns the number of requests this process rejected, per throttle scope.
+    """
+    with _rejections_lock:
+        return dict(_rejections)
+
+
+def reset_throttle_stats():
+    with _rejections_lock:
+        _rejections.clear()
+
+
+def parse_rate(rate):
+    """
+    Parses a DRF style rate such as "10/minute" into (requests, seconds).
+    """
+    count, period = rate.split("/")
+    return int(count), {"s": 1, "m": 60, "h": 3600, "d": 86400}[period[0]]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Limits requests per identity with a sliding window counter kept in the
+    THROTTLE_CACHE_ALIAS cache: two fixed window counters, the previous one
+    weighted by how much of it still overlaps the sliding window. Each check
+    is one get_many and one incr, whatever the rate.
+    Views set `throttle_scope`; the rate comes from DEFAULT_THROTTLE_RATES
+    under the scope returned by get_scope(). Subclasses implement
+    get_identity().
+    """
+
+    def get_scope(self, view):
+        return getattr(view, "throttle_scope", None)
+
+    def get_identity(self, request, view):
+        """
+        Returns the identity whose requests are counted, or None to let the
+        request through unthrottled.
+        """
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = self.get_scope(view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope) if scope else None
+        ident = self.get_identity(request, view) if rate else None
+        if not ident:
+            return True
+
+        limit, duration = parse_rate(rate)
+        now = time.time()
+        window, offset = divmod(now, duration)
+        key = f"throttle:{scope}:{ident}"
+        current_key = f"{key}:{int(window)}"
+        previous_key = f"{key}:{int(window) - 1}"
+        cache = caches[settings.THROTTLE_CACHE_ALIAS]
+
+        counts = cache.get_many([current_key, previous_key])
+        overlap = 1 - offset / duration
+        used = counts.get(previous_key, 0) * overlap + counts.get(current_key, 0)
+        if used >= limit:
+            self.wait_seconds = duration - offset
+            record_rejection(scope)
+            return False
+
+        if not cache.add(current_key, 1, 2 * duration):
+            try:
+                cache.incr(current_key)
+            except ValueError:
+                cache.set(current_key, 1, 2 * duration)
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPThrottle(SlidingWindowThrottle):
+    """
+    Throttles by client IP address under the view's throttle_scope. The
+    address is REMOTE_ADDR, or the X-Forwarded-For entry added by the last
+    of the NUM_PROXIES trusted proxies.
+    """
+
+    def get_identity(self, request, view):
+        return self.get_ident(request)
+
+
+class AccountThrottle(SlidingWindowThrottle):
+    """
+    Throttles by the account named in the request body, read from the
+    view's `throttle_account_field`, under "<throttle_scope>_account". This
+    stops a single account being targeted from many addresses.
+    """
+
+    def get_scope(self, view):
+        scope = super().get_scope(view)
+        return scope and f"{scope}_account"
+
+    def get_identity(self, request, view):
+        field = getattr(view, "throttle_account_field", None)
+        try:
+            value = request.data.get(field) if field else None
+        except AttributeError:
+            return None
+        if value is None or not str(value).strip():
+            return None
+        account = str(value).strip().casefold().encode()
+        return hashlib.md5(account, usedforsecurity=False).hexdigest()
+
+
+class LoadSheddingMixin:
+    """
+    Caps how many requests of the view a process works on at once. Beyond
+    `max_concurrent_requests` (MAX_CONCURRENT_PASSWORD_HASHING by default),
+    requests are rejected with a 503 straight away instead of queueing
+    behind the expensive ones, such as password hashing.
+    """
+
+    max_concurrent_requests = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        cls._slots = threading.BoundedSemaphore(
+            cls.max_concurrent_requests or settings.MAX_CONCURRENT_PASSWORD_HASHING
+        )
+        return super().as_view(**initkwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            record_rejection(f"{getattr(self, 'throttle_scope', 'view')}_shed")
+            return JsonResponse(
+                {"detail": "The server is busy, please retry shortly."},
+                status=503,
+                headers={"Retry-After": "1"},
+            )
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            self._slots.release()
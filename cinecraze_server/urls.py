@@ -20,11 +20,12 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
-from .views import health_check
+from .views import health_check, throttle_stats_view
 
 urlpatterns = [
     path("", health_check, name="health_check"),
     path("admin/", admin.site.urls),
+    path("throttle-stats/", throttle_stats_view, name="throttle_stats"),
     path("user/", include("user_account.urls")),
     path("api/", include("movies_and_series.urls")),
     path("auth/", include("rest_framework.urls")),
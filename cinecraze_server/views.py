@@ -1,5 +1,19 @@
 from django.http import HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .throttling import throttle_stats
 
 
 def health_check(request):
     return HttpResponse("SERVER IS UP", status=200)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def throttle_stats_view(request):
+    """
+    Number of requests throttled or shed by this process, per scope.
+    """
+    return Response({"rejections": throttle_stats()})
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MoviesAndSeriesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'movies_and_series'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,188 @@
+import hashlib
+import time
+from datetime import date, datetime
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from cinecraze_server.cache import is_shared_cache
+from cinecraze_server.conditional import ConditionalGetMixin, make_etag
+
+CATALOG_VERSION_KEY = "catalog:version"
+CATALOG_MODIFIED_KEY = "catalog:modified"
+
+
+def get_catalog_cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def catalog_cache_is_shared():
+    """
+    Returns whether the catalog version and cached responses are shared by
+    all workers. A process-local cache only sees the writes of its own
+    process, so other workers would serve stale pages until the timeout:
+    response caching and version based revalidation are then turned off.
+    """
+    return is_shared_cache(get_catalog_cache())
+
+
+def get_catalog_version():
+    """
+    Returns the current catalog version, bumped on every movie write. Every
+    cached catalog response is keyed by it, so a bump invalidates them all.
+    """
+    cache = get_catalog_cache()
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Start from the clock rather than 1 so that a lost version key never
+        # makes responses cached under an old version reachable again.
+        cache.add(CATALOG_VERSION_KEY, time.time_ns() // 1000, None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def get_catalog_modified():
+    """
+    Returns when the catalog last changed, as a POSIX timestamp.
+    """
+    cache = get_catalog_cache()
+    modified = cache.get(CATALOG_MODIFIED_KEY)
+    if modified is None:
+        cache.add(CATALOG_MODIFIED_KEY, time.time(), None)
+        modified = cache.get(CATALOG_MODIFIED_KEY)
+    return modified
+
+
+def bump_catalog_version():
+    cache = get_catalog_cache()
+    cache.set(CATALOG_MODIFIED_KEY, time.time(), None)
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        get_catalog_version()
+        return cache.incr(CATALOG_VERSION_KEY)
+
+
+def get_user_tier(user):
+    return user.user_type if user.is_authenticated else "anonymous"
+
+
+def catalog_cache_key(request, prefix="response"):
+    """
+    Builds a cache key from the catalog version, today's date (some filters
+    and collections are relative to it), the user's tier, the negotiated
+    format and the path with its normalized query parameters.
+    """
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+        if value != ""
+    )
+    digest = hashlib.md5(
+        f"{request.path}?{urlencode(params)}".encode(), usedforsecurity=False
+    ).hexdigest()
+    return ":".join(
+        [
+            "catalog",
+            prefix,
+            str(get_catalog_version()),
+            date.today().isoformat(),
+            get_user_tier(request.user),
+            request.accepted_renderer.format,
+            digest,
+        ]
+    )
+
+
+class CatalogConditionalGetMixin(ConditionalGetMixin):
+    """
+    Validates catalog reads against the catalog version, so revalidating an
+    unchanged page costs no database query at all. Without a shared catalog
+    cache the version is not global, and the validators are read from the
+    database instead: the row's modified_at for details, and the ids and
+    modified_at of the page being served for lists.
+    """
+
+    def get_validators(self, request, *args, **kwargs):
+        if not catalog_cache_is_shared():
+            return self.get_database_validators(request, *args, **kwargs)
+        etag = make_etag(catalog_cache_key(request, prefix="etag"))
+        # Filters relative to today change results at midnight without any
+        # write, so nothing is reported unmodified across days.
+        start_of_day = datetime.combine(date.today(), datetime.min.time())
+        return etag, max(get_catalog_modified(), start_of_day.timestamp())
+
+    def get_database_validators(self, request, *args, **kwargs):
+        parts = [
+            request.get_full_path(),
+            get_user_tier(request.user),
+            request.accepted_renderer.format,
+        ]
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        if lookup in kwargs:
+            modified_at = (
+                self.get_queryset()
+                .filter(**{self.lookup_field: kwargs[lookup]})
+                .values_list("modified_at", flat=True)
+                .first()
+            )
+            etag = make_etag(*parts, modified_at and modified_at.isoformat())
+            return etag, modified_at and modified_at.timestamp()
+
+        # One page sized query over the same index range as the page itself.
+        queryset = self.filter_queryset(self.get_queryset())
+        paginator = self.pagination_class()
+        ordering = paginator.get_ordering(request, queryset, self)
+        rows = queryset.values(
+            "id", "modified_at", *(name.lstrip("-") for name in ordering)
+        )
+        page = paginator.paginate_queryset(rows, request, view=self)
+        etag = make_etag(
+            *parts,
+            [(row["id"], row["modified_at"].isoformat()) for row in page],
+            paginator.has_next,
+            paginator.has_previous,
+        )
+        # Rows leaving the page change no modification time, so lists are
+        # validated by ETag only.
+        return etag, None
+
+
+class CatalogResponseCacheMixin:
+    """
+    Caches the rendered JSON of list and detail responses until the catalog
+    version changes, so repeated reads skip the database and serialization.
+    """
+
+    cached_actions = ("list", "retrieve")
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.accepted_renderer.format != "json" or not catalog_cache_is_shared():
+            return handler(request, *args, **kwargs)
+
+        cache = get_catalog_cache()
+        key = catalog_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.add_post_render_callback(
+                lambda rendered: cache.set(
+                    key,
+                    (rendered.content, rendered["Content-Type"]),
+                    settings.CATALOG_CACHE_TIMEOUT,
+                )
+            )
+        return response
@@ -0,0 +1,107 @@
+import base64
+import binascii
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import MovieTombstone
+
+
+def encode_cursor(timestamp):
+    return base64.urlsafe_b64encode(timestamp.isoformat().encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Returns the timestamp held by a cursor from encode_cursor, or raises
+    ValueError if the cursor is malformed.
+    """
+    try:
+        timestamp = parse_datetime(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError):
+        timestamp = None
+    if timestamp is None or timezone.is_naive(timestamp):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return timestamp
+
+
+def record_tombstones(tmdb_ids):
+    """
+    Logs the deletion of the given movies and prunes the tombstones older
+    than the retention period.
+    """
+    now = timezone.now()
+    MovieTombstone.objects.bulk_create(
+        [MovieTombstone(tmdb_id=tmdb_id, deleted_at=now) for tmdb_id in tmdb_ids],
+        update_conflicts=True,
+        unique_fields=["tmdb_id"],
+        update_fields=["deleted_at"],
+    )
+    MovieTombstone.objects.filter(deleted_at__lt=tombstone_horizon()).delete()
+
+
+def tombstone_horizon():
+    """
+    Returns the oldest cursor that can still be synced from: deletions before
+    it may have been pruned from the log.
+    """
+    return timezone.now() - timedelta(days=settings.MOVIE_TOMBSTONE_RETENTION_DAYS)
+
+
+def catalog_changes(queryset, columns, since=None, limit=None, max_tier=None):
+    """
+    Returns the changes to the movies in `queryset` after the `since`
+    timestamp, oldest first, as a dictionary with:
+    - "movies": the values() rows, with `columns`, of saved movies
+    - "deleted": the tmdb ids of deleted movies
+    - "cursor": the timestamp to pass as `since` to get the next changes
+    - "has_more": whether changes were left out because of `limit`
+
+    With `max_tier`, movies above that user tier are left out, and reported
+    as deleted if they changed after `since`, as they may have been visible
+    before.
+    Rows modified in the last MOVIE_CHANGES_LAG_SECONDS are held back, so a
+    transaction that commits after a later one is not skipped by the cursor.
+    Without `since`, the whole catalog is returned and deletions are left out.
+    """
+    limit = limit or settings.MOVIE_CHANGES_PAGE_SIZE
+    until = timezone.now() - timedelta(seconds=settings.MOVIE_CHANGES_LAG_SECONDS)
+    movies = queryset.filter(modified_at__lte=until).order_by("modified_at", "id")
+    if since is not None:
+        movies = movies.filter(modified_at__gt=since)
+    columns = list(
+        dict.fromkeys(["id", "tmdb_id", "modified_at", "min_tier", *columns])
+    )
+
+    rows = list(movies.values(*columns)[: limit + 1])
+    has_more = len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+        last = rows[-1]
+        until = last["modified_at"]
+        # The cursor skips past `until`, so finish its rows in this page.
+        rows.extend(
+            movies.filter(modified_at=until, id__gt=last["id"]).values(*columns)
+        )
+
+    hidden = []
+    if max_tier is not None:
+        hidden = [row["tmdb_id"] for row in rows if row["min_tier"] > max_tier]
+        rows = [row for row in rows if row["min_tier"] <= max_tier]
+
+    deleted = []
+    if since is not None:
+        saved = {row["tmdb_id"] for row in rows}
+        deleted = hidden + [
+            tmdb_id
+            for tmdb_id in MovieTombstone.objects.filter(
+                deleted_at__gt=since, deleted_at__lte=until
+            )
+            .order_by("deleted_at", "id")
+            .values_list("tmdb_id", flat=True)
+            # A movie added back after its deletion is sent as saved.
+            if tmdb_id not in saved
+        ]
+    return {"movies": rows, "deleted": deleted, "cursor": until, "has_more": has_more}
@@ -0,0 +1,133 @@
+from collections import Counter
+
+from django.db.models import Count, Q
+
+from .indexes import CatalogIndex
+from .lookups import LOOKUP_FIELDS, count_tags
+from .models import LookupTag, Movie
+
+TIERS = ("standard", "premium")
+FACET_FIELDS = (
+    "tmdb_id",
+    "min_tier",
+    *LOOKUP_FIELDS,
+    *(f"{tier}_user" for tier in TIERS),
+)
+
+
+def sorted_counts(counts, names):
+    return [
+        {"name": names[key], "count": count}
+        for key, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        if count
+    ]
+
+
+class FacetIndex(CatalogIndex):
+    """
+    Counts of the whole catalog per genre, language, production country and
+    tier, kept in counters that saves and deletes adjust incrementally. The
+    counters are bucketed by the movies' min_tier, so the counts seen by a
+    user tier are the sum of the buckets available to it.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._reset()
+
+    def _reset(self):
+        self._buckets = {
+            min_tier: {
+                "size": 0,
+                "tiers": Counter(),
+                **{field: Counter() for field in LOOKUP_FIELDS},
+            }
+            for min_tier, _ in Movie.TIER_CHOICES
+        }
+        self._names = {field: {} for field in LOOKUP_FIELDS}
+        self._movies = {}
+
+    def rebuild(self):
+        self._reset()
+        for row in Movie.objects.values(*FACET_FIELDS).iterator():
+            self._add(row["tmdb_id"], row)
+
+    def apply(self, movies, deleted):
+        for tmdb_id in deleted:
+            self._remove(tmdb_id)
+        for movie in movies:
+            self._remove(movie.tmdb_id)
+            self._add(
+                movie.tmdb_id, {name: getattr(movie, name) for name in FACET_FIELDS}
+            )
+
+    def _add(self, tmdb_id, row):
+        bucket = self._buckets[row["min_tier"]]
+        tags = {}
+        for field in LOOKUP_FIELDS:
+            keys = {
+                LookupTag.normalize(name): name
+                for name in row[field] or []
+                if isinstance(name, str) and name.strip()
+            }
+            for key, name in keys.items():
+                self._names[field].setdefault(key, name)
+            bucket[field].update(keys.keys())
+            tags[field] = tuple(keys)
+        tiers = tuple(tier for tier in TIERS if row[f"{tier}_user"])
+        bucket["tiers"].update(tiers)
+        bucket["size"] += 1
+        self._movies[tmdb_id] = (row["min_tier"], tags, tiers)
+
+    def _remove(self, tmdb_id):
+        if tmdb_id not in self._movies:
+            return
+        min_tier, tags, tiers = self._movies.pop(tmdb_id)
+        bucket = self._buckets[min_tier]
+        for field, keys in tags.items():
+            bucket[field].subtract(keys)
+        bucket["tiers"].subtract(tiers)
+        bucket["size"] -= 1
+
+    def counts(self, max_tier=Movie.PREMIUM):
+        with self._lock:
+            buckets = [
+                bucket
+                for min_tier, bucket in self._buckets.items()
+                if min_tier <= max_tier
+            ]
+            return {
+                "count": sum(bucket["size"] for bucket in buckets),
+                **{
+                    field: sorted_counts(
+                        sum((bucket[field] for bucket in buckets), Counter()),
+                        self._names[field],
+                    )
+                    for field in LOOKUP_FIELDS
+                },
+                "tiers": {
+                    tier: sum(bucket["tiers"][tier] for bucket in buckets)
+                    for tier in TIERS
+                },
+            }
+
+
+def count_facets(queryset):
+    """
+    Computes the facet counts of the movies in `queryset` with aggregate
+    queries over the lookup tables, without loading any movie.
+    """
+    queryset = queryset.order_by()
+    tiers = queryset.aggregate(
+        count=Count("id"),
+        **{tier: Count("id", filter=Q(**{f"{tier}_user": True})) for tier in TIERS},
+    )
+    movie_ids = queryset.values("id")
+    return {
+        "count": tiers.pop("count"),
+        **{field: count_tags(field, movie_ids) for field in LOOKUP_FIELDS},
+        "tiers": tiers,
+    }
+
+
+facet_index = FacetIndex()
@@ -0,0 +1,88 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .caching import get_catalog_version
+from .changes import tombstone_horizon
+from .models import Movie, MovieTombstone
+
+
+class CatalogIndex:
+    """
+    Base class of the in-process indexes over the movie catalog. An index is
+    built from the database once, then kept current with deltas:
+    catalog_changed() applies the writes of this process as they commit, and
+    ensure_current() applies the movies modified and deleted since the last
+    sync whenever the catalog version moved or CATALOG_INDEX_POLL_SECONDS
+    passed, which picks up writes made by other processes. A delta is two
+    range scans over the modified_at and deleted_at indexes, so lookups never
+    wait on a full rebuild after the first one.
+    Subclasses implement rebuild() and apply(movies, deleted); apply() must
+    accept movies it already holds.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        """
+        Drops the index; it is rebuilt from the database on next use.
+        """
+        with self._lock:
+            self.version = None
+            # Writes at or after synced_at may not be in the index yet.
+            self.synced_at = None
+            self.checked_at = 0
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def apply(self, movies, deleted):
+        raise NotImplementedError
+
+    def ensure_current(self):
+        version = get_catalog_version()
+        # A process-local version never moves for other processes' writes;
+        # the poll then bounds how long those stay invisible.
+        if (
+            self.synced_at is not None
+            and self.version == version
+            and time.monotonic() - self.checked_at < settings.CATALOG_INDEX_POLL_SECONDS
+        ):
+            return
+        with self._lock:
+            # Rows committed during the load are picked up by the next delta.
+            synced_at = timezone.now() - timedelta(
+                seconds=settings.MOVIE_CHANGES_LAG_SECONDS
+            )
+            if self.synced_at is None or self.synced_at < tombstone_horizon():
+                self.rebuild()
+            else:
+                self.apply_changes(self.synced_at)
+            self.version = version
+            self.synced_at = synced_at
+            self.checked_at = time.monotonic()
+
+    def apply_changes(self, since):
+        movies = list(Movie.objects.filter(modified_at__gte=since))
+        saved = {movie.tmdb_id for movie in movies}
+        deleted = [
+            tmdb_id
+            for tmdb_id in MovieTombstone.objects.filter(
+                deleted_at__gte=since
+            ).values_list("tmdb_id", flat=True)
+            # A movie added back after its deletion is applied as saved.
+            if tmdb_id not in saved
+        ]
+        if movies or deleted:
+            self.apply(movies, deleted)
+
+    def catalog_changed(self, version, movies, deleted):
+        with self._lock:
+            if self.version is not None and self.version == version - 1:
+                self.apply(movies, deleted)
+                self.version = version
@@ -0,0 +1,179 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .lookups import sync_lookup_tags
+from .models import Movie
+from .serializers import MovieIngestSerializer
+from .signals import notify_catalog_changed
+from .tmdb import TokenBucket, fetch_many_from_tmdb
+
+
+def ingest_movies(entries, concurrency=None, batch_size=None):
+    """
+    Adds many movies at once. Each entry is a dict with tmdb_id,
+    download_urls, streaming_urls, standard_user and premium_user, as accepted
+    by add_movie. TMDB data is fetched in parallel and rows are upserted on
+    tmdb_id with bulk_create in batches, so movies that were already added are
+    updated rather than rejected.
+    Returns one result per entry, in order, with a status of "created",
+    "updated" or "failed".
+    """
+    results = []
+    pending = {}
+    for entry in entries:
+        serializer = MovieIngestSerializer(data=entry)
+        if not serializer.is_valid():
+            tmdb_id = entry.get("tmdb_id") if isinstance(entry, dict) else None
+            results.append(
+                {"tmdb_id": tmdb_id, "status": "failed", "error": serializer.errors}
+            )
+            continue
+        result = {"tmdb_id": serializer.validated_data["tmdb_id"]}
+        if result["tmdb_id"] in pending:
+            result.update(status="failed", error="Duplicate tmdb id in request.")
+        else:
+            pending[result["tmdb_id"]] = serializer.validated_data
+        results.append(result)
+
+    existing = set(
+        Movie.objects.filter(tmdb_id__in=pending).values_list("tmdb_id", flat=True)
+    )
+    movie_data_by_id = fetch_many_from_tmdb(pending, max_workers=concurrency)
+
+    synced_at = timezone.now()
+    movies = []
+    for result in results:
+        if "status" in result:
+            continue
+        tmdb_id = result["tmdb_id"]
+        movie_data = movie_data_by_id.get(tmdb_id)
+        if not movie_data or not movie_data["release_date"]:
+            result.update(
+                status="failed",
+                error="Failed to fetch data from TMDB. Please Check the tmdb id.",
+            )
+        else:
+            movie = Movie(**pending[tmdb_id], **movie_data, tmdb_synced_at=synced_at)
+            # bulk_create skips save(), which derives min_tier.
+            movie.min_tier = movie.compute_min_tier()
+            movies.append(movie)
+            result["status"] = "updated" if tmdb_id in existing else "created"
+
+    Movie.objects.bulk_create(
+        movies,
+        batch_size=batch_size or settings.MOVIE_BULK_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["tmdb_id"],
+        update_fields=[
+            "download_urls",
+            "streaming_urls",
+            "standard_user",
+            "premium_user",
+            "min_tier",
+            *Movie.TMDB_FIELDS,
+            "tmdb_synced_at",
+            "modified_at",
+        ],
+    )
+    # bulk_create skips post_save, so the lookup tables are synced and the
+    # catalog change announced here.
+    saved = list(Movie.objects.filter(tmdb_id__in=[movie.tmdb_id for movie in movies]))
+    sync_lookup_tags(saved)
+    if saved:
+        notify_catalog_changed(
+            movies=saved,
+            created=[
+                result["tmdb_id"]
+                for result in results
+                if result.get("status") == "created"
+            ],
+        )
+    return results
+
+
+def changed_movie_fields(movie, movie_data):
+    """
+    Returns a dictionary of the fields whose TMDB value differs from the one
+    stored on the movie, mapped to the new value converted to Python.
+    """
+    changes = {}
+    for name, value in movie_data.items():
+        try:
+            value = Movie._meta.get_field(name).to_python(value)
+        except ValidationError:
+            continue
+        if value is not None and value != getattr(movie, name):
+            changes[name] = value
+    return changes
+
+
+def refresh_movies(limit, rate=None, burst=None, concurrency=None, stale_after=None):
+    """
+    Refreshes the TMDB metadata of the `limit` least recently synced movies.
+    Fetches go through a token bucket (TMDB_RATE_LIMIT requests per second
+    by default) and rows are written with bulk_update, one statement per set
+    of changed fields, so unchanged columns are never rewritten.
+    Movies whose fetch failed are stamped as synced as well, so they are
+    retried after the others rather than on every run.
+    Returns counts of the checked, updated, unchanged and failed movies.
+    """
+    queryset = Movie.objects.order_by(F("tmdb_synced_at").asc(nulls_first=True), "id")
+    if stale_after is not None:
+        queryset = queryset.filter(
+            Q(tmdb_synced_at__isnull=True)
+            | Q(tmdb_synced_at__lt=timezone.now() - stale_after)
+        )
+    movies = list(queryset[:limit])
+
+    movie_data_by_id = fetch_many_from_tmdb(
+        [movie.tmdb_id for movie in movies],
+        max_workers=concurrency,
+        limiter=TokenBucket(rate or settings.TMDB_RATE_LIMIT, burst),
+        refresh=True,
+    )
+
+    synced_at = timezone.now()
+    unchanged = []
+    changed_groups = defaultdict(list)
+    failed = []
+    for movie in movies:
+        movie_data = movie_data_by_id.get(movie.tmdb_id)
+        if not movie_data:
+            failed.append(movie.pk)
+            continue
+        changes = changed_movie_fields(movie, movie_data)
+        if not changes:
+            unchanged.append(movie.pk)
+            continue
+        for name, value in changes.items():
+            setattr(movie, name, value)
+        movie.tmdb_synced_at = synced_at
+        movie.modified_at = synced_at
+        changed_groups[tuple(changes)].append(movie)
+
+    # Failed movies go to the back of the queue too, so ids TMDB no longer
+    # serves cannot hold the oldest slots forever.
+    Movie.objects.filter(pk__in=unchanged + failed).update(tmdb_synced_at=synced_at)
+    for fields, group in changed_groups.items():
+        Movie.objects.bulk_update(
+            group,
+            [*fields, "tmdb_synced_at", "modified_at"],
+            batch_size=settings.MOVIE_BULK_BATCH_SIZE,
+        )
+        sync_lookup_tags(group, fields=fields)
+    if changed_groups:
+        notify_catalog_changed(
+            movies=[movie for group in changed_groups.values() for movie in group]
+        )
+
+    updated = sum(len(group) for group in changed_groups.values())
+    return {
+        "checked": len(movies),
+        "updated": updated,
+        "unchanged": len(unchanged),
+        "failed": len(failed),
+    }
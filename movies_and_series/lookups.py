@@ -0,0 +1,89 @@
+from django.db.models import Count
+
+from .models import Genre, LookupTag, Language, Movie, ProductionCountry
+
+# JSON column -> (many-to-many field, lookup model)
+LOOKUP_FIELDS = {
+    "genres": ("genre_tags", Genre),
+    "languages": ("language_tags", Language),
+    "production_countries": ("production_country_tags", ProductionCountry),
+}
+
+
+def parse_tag_keys(value):
+    """
+    Splits a comma separated filter value ("Action,Drama") into lookup keys.
+    """
+    return [LookupTag.normalize(name) for name in value.split(",") if name.strip()]
+
+
+def filter_by_tags(queryset, json_field, value):
+    """
+    Filters movies having any of the comma separated names in `value`, using
+    the indexed lookup tables instead of scanning the JSON column.
+    """
+    m2m_field, model = LOOKUP_FIELDS[json_field]
+    through = getattr(Movie, m2m_field).through
+    movie_ids = through.objects.filter(
+        **{f"{model._meta.model_name}__key__in": parse_tag_keys(value)}
+    ).values("movie_id")
+    return queryset.filter(id__in=movie_ids)
+
+
+def count_tags(json_field, movie_ids):
+    """
+    Counts the movies among `movie_ids` (a queryset of ids) per name of the
+    given JSON field, most common first, from the lookup tables.
+    """
+    m2m_field, model = LOOKUP_FIELDS[json_field]
+    through = getattr(Movie, m2m_field).through
+    name = f"{model._meta.model_name}__name"
+    rows = (
+        through.objects.filter(movie_id__in=movie_ids)
+        .values(name, f"{model._meta.model_name}__key")
+        .annotate(count=Count("movie_id"))
+        .order_by("-count", f"{model._meta.model_name}__key")
+    )
+    return [{"name": row[name], "count": row["count"]} for row in rows]
+
+
+def sync_lookup_tags(movies, fields=None):
+    """
+    Brings the lookup tables of the given (saved) movies in line with their
+    genres, languages and production_countries JSON. Pass `fields` to only
+    sync some of the JSON columns.
+    """
+    movies = [movie for movie in movies if movie.pk is not None]
+    if not movies:
+        return
+    for json_field, (m2m_field, model) in LOOKUP_FIELDS.items():
+        if fields is not None and json_field not in fields:
+            continue
+        movie_keys = {
+            movie.pk: {
+                LookupTag.normalize(name): name
+                for name in getattr(movie, json_field) or []
+                if isinstance(name, str) and name.strip()
+            }
+            for movie in movies
+        }
+        names = {
+            key: name for keys in movie_keys.values() for key, name in keys.items()
+        }
+        model.objects.bulk_create(
+            [model(key=key, name=name) for key, name in names.items()],
+            ignore_conflicts=True,
+        )
+        tag_ids = dict(model.objects.filter(key__in=names).values_list("key", "id"))
+
+        through = getattr(Movie, m2m_field).through
+        tag_column = f"{model._meta.model_name}_id"
+        through.objects.filter(movie_id__in=movie_keys).delete()
+        through.objects.bulk_create(
+            [
+                through(movie_id=movie_id, **{tag_column: tag_ids[key]})
+                for movie_id, keys in movie_keys.items()
+                for key in keys
+            ],
+            ignore_conflicts=True,
+        )
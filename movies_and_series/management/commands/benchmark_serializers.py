@@ -0,0 +1,85 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from movies_and_series.models import Movie
+from movies_and_series.serializers import (
+    MovieListSerializer,
+    MovieSerializer,
+    ValuesRowSerializer,
+)
+
+
+def sample_movie(tmdb_id):
+    return Movie(
+        id=tmdb_id,
+        tmdb_id=tmdb_id,
+        imdb_id=f"tt{tmdb_id}",
+        download_urls={"720p": f"https://example.com/{tmdb_id}/720"},
+        streaming_urls={"720p": f"https://example.com/{tmdb_id}/stream"},
+        title=f"Movie {tmdb_id}",
+        overview="An overview of the movie. " * 10,
+        languages=["English", "French"],
+        casts=[
+            {"name": f"Actor {i}", "character": f"Role {i}", "profile_path": ""}
+            for i in range(5)
+        ],
+        imdb_rating=7.1,
+        tmdb_rating=7.1,
+        director={"name": "Director", "profile_path": ""},
+        genres=["Action", "Drama"],
+        release_date=date(2024, 1, 1),
+        poster_url="https://image.tmdb.org/t/p/w500/poster.jpg",
+        backdrop_url="https://image.tmdb.org/t/p/original/backdrop.jpg",
+        trailer_url="https://www.youtube.com/watch?v=abc",
+        production_countries=["United States of America"],
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the per-row cost of the DRF movie serializers with the "
+        "ValuesRowSerializer fast path, without touching the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000])
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def best_time(self, function, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        for serializer_class in (MovieSerializer, MovieListSerializer):
+            row_serializer = ValuesRowSerializer(serializer_class)
+            for count in options["rows"]:
+                movies = [sample_movie(tmdb_id) for tmdb_id in range(1, count + 1)]
+                rows = [
+                    {
+                        column: getattr(movie, column)
+                        for column in row_serializer.columns
+                    }
+                    for movie in movies
+                ]
+                drf = self.best_time(
+                    lambda: renderer.render(serializer_class(movies, many=True).data),
+                    options["repeat"],
+                )
+                fast = self.best_time(
+                    lambda: renderer.render(row_serializer.serialize(rows)),
+                    options["repeat"],
+                )
+                self.stdout.write(
+                    f"{serializer_class.__name__:<20} {count:>7} rows: "
+                    f"DRF {drf / count * 1e6:7.1f} us/row, "
+                    f"fast path {fast / count * 1e6:7.1f} us/row "
+                    f"({drf / fast:.1f}x)"
+                )
@@ -0,0 +1,58 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from movies_and_series.ingest import ingest_movies
+
+
+class Command(BaseCommand):
+    help = (
+        "Adds movies in bulk from a JSON file containing a list of "
+        "{tmdb_id, download_urls, streaming_urls, standard_user, premium_user} "
+        "entries. Use '-' to read from stdin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSON file with the movies to add.")
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=None,
+            help="Maximum number of parallel TMDB requests.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Number of rows per INSERT.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options["path"] == "-":
+                entries = json.load(sys.stdin)
+            else:
+                with open(options["path"]) as file:
+                    entries = json.load(file)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read movies: {e}")
+        if not isinstance(entries, list):
+            raise CommandError("Expected a list of movies.")
+
+        results = ingest_movies(
+            entries,
+            concurrency=options["concurrency"],
+            batch_size=options["batch_size"],
+        )
+        for result in results:
+            if result["status"] == "failed":
+                self.stderr.write(f"{result['tmdb_id']}: {result['error']}")
+        created = sum(result["status"] == "created" for result in results)
+        updated = sum(result["status"] == "updated" for result in results)
+        failed = len(results) - created - updated
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {created} movies, updated {updated}, {failed} failed."
+            )
+        )
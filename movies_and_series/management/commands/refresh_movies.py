@@ -0,0 +1,74 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from movies_and_series.ingest import refresh_movies
+
+
+class Command(BaseCommand):
+    help = (
+        "Refreshes TMDB metadata (ratings, posters, trailers, ...) of the least "
+        "recently synced movies, staying under the TMDB rate limit."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=100,
+            help="Number of movies to refresh per pass.",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=None,
+            help="Maximum TMDB requests per second (TMDB_RATE_LIMIT by default).",
+        )
+        parser.add_argument(
+            "--burst",
+            type=int,
+            default=None,
+            help="Maximum number of requests sent in a burst.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=None,
+            help="Maximum number of parallel TMDB requests.",
+        )
+        parser.add_argument(
+            "--stale-hours",
+            type=float,
+            default=None,
+            help="Only refresh movies not synced within this many hours.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="Keep running, starting a new pass every this many seconds.",
+        )
+
+    def handle(self, *args, **options):
+        stale_after = None
+        if options["stale_hours"] is not None:
+            stale_after = timedelta(hours=options["stale_hours"])
+
+        while True:
+            counts = refresh_movies(
+                options["limit"],
+                rate=options["rate"],
+                burst=options["burst"],
+                concurrency=options["concurrency"],
+                stale_after=stale_after,
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    "Checked {checked} movies: {updated} updated, "
+                    "{unchanged} unchanged, {failed} failed.".format(**counts)
+                )
+            )
+            if options["interval"] is None:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies_and_series", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="movie",
+            name="tmdb_synced_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies_and_series", "0002_movie_tmdb_synced_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="movie",
+            index=models.Index(
+                fields=["release_date", "id"], name="movie_release_date_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies_and_series", "0003_movie_movie_release_date_id_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Genre",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                ("key", models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="Language",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                ("key", models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="ProductionCountry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                ("key", models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                "verbose_name_plural": "production countries",
+            },
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="genre_tags",
+            field=models.ManyToManyField(
+                blank=True, related_name="movies", to="movies_and_series.genre"
+            ),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="language_tags",
+            field=models.ManyToManyField(
+                blank=True, related_name="movies", to="movies_and_series.language"
+            ),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="production_country_tags",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="movies",
+                to="movies_and_series.productioncountry",
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+LOOKUP_FIELDS = {
+    "genres": ("genre_tags", "Genre"),
+    "languages": ("language_tags", "Language"),
+    "production_countries": ("production_country_tags", "ProductionCountry"),
+}
+
+
+def normalize(name):
+    return " ".join(name.split()).casefold()
+
+
+def backfill_lookup_tags(apps, schema_editor):
+    Movie = apps.get_model("movies_and_series", "Movie")
+    movies = Movie.objects.only("id", *LOOKUP_FIELDS)
+    for json_field, (m2m_field, model_name) in LOOKUP_FIELDS.items():
+        model = apps.get_model("movies_and_series", model_name)
+        through = getattr(Movie, m2m_field).through
+        tag_column = f"{model._meta.model_name}_id"
+        tag_ids = {}
+        links = []
+        for movie in movies.iterator(chunk_size=1000):
+            keys = set()
+            for name in getattr(movie, json_field) or []:
+                if not isinstance(name, str) or not name.strip():
+                    continue
+                key = normalize(name)
+                if key not in tag_ids:
+                    tag_ids[key] = model.objects.get_or_create(
+                        key=key, defaults={"name": name}
+                    )[0].pk
+                keys.add(key)
+            links.extend(
+                through(movie_id=movie.pk, **{tag_column: tag_ids[key]}) for key in keys
+            )
+        through.objects.bulk_create(links, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies_and_series", "0004_movie_lookup_tags"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_lookup_tags, migrations.RunPython.noop),
+    ]
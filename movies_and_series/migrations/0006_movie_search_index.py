@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from movies_and_series.search import install_search_index, remove_search_index
+
+
+def install(apps, schema_editor):
+    install_search_index(schema_editor.connection)
+
+
+def remove(apps, schema_editor):
+    remove_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies_and_series", "0005_backfill_lookup_tags"),
+    ]
+
+    operations = [
+        migrations.RunPython(install, remove),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies_and_series", "0007_movie_modified_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MovieTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("tmdb_id", models.IntegerField(unique=True)),
+                ("deleted_at", models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="movie",
+            index=models.Index(
+                fields=["tmdb_rating", "id"], name="movie_tmdb_rating_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="movie",
+            index=models.Index(
+                fields=["premium_user", "standard_user", "release_date"],
+                name="movie_tier_release_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="movie",
+            index=models.Index(
+                fields=["modified_at", "id"], name="movie_modified_at_id_idx"
+            ),
+        ),
+    ]
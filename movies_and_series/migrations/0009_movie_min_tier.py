@@ -0,0 +1,48 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:56
+
+from django.db import migrations, models
+
+STANDARD = 1
+PREMIUM = 2
+
+
+def backfill_min_tier(apps, schema_editor):
+    Movie = apps.get_model("movies_and_series", "Movie")
+    Movie.objects.filter(standard_user=True).update(min_tier=STANDARD)
+    Movie.objects.filter(standard_user=False, premium_user=True).update(
+        min_tier=PREMIUM
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies_and_series", "0008_movie_sort_indexes_and_tombstones"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="movie",
+            name="min_tier",
+            field=models.PositiveSmallIntegerField(
+                choices=[(0, "basic"), (1, "standard"), (2, "premium")], default=0
+            ),
+        ),
+        migrations.RunPython(backfill_min_tier, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="movie",
+            index=models.Index(
+                condition=models.Q(("min_tier", 0)),
+                fields=["release_date", "id"],
+                name="movie_basic_release_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="movie",
+            index=models.Index(
+                condition=models.Q(("min_tier__lte", 1)),
+                fields=["release_date", "id"],
+                name="movie_std_release_date_idx",
+            ),
+        ),
+    ]
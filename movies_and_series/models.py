@@ -3,7 +3,87 @@ from django.db import models
 from django.db.models import JSONField
 
 
+class LookupTag(models.Model):
+    """
+    A name taken from the TMDB payload, such as a genre, stored once and
+    matched through its case-insensitive key.
+    """
+
+    name = models.CharField(max_length=100)
+    key = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        abstract = True
+
+    @staticmethod
+    def normalize(name):
+        return " ".join(name.split()).casefold()
+
+    def __str__(self):
+        return self.name
+
+
+class Genre(LookupTag):
+    pass
+
+
+class Language(LookupTag):
+    pass
+
+
+class ProductionCountry(LookupTag):
+    class Meta:
+        verbose_name_plural = "production countries"
+
+
+class MovieQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Restricts the movies to the ones the user's tier is entitled to. The
+        conditions match the partial indexes' predicates word for word, as
+        the planner only uses a partial index it can prove applies.
+        """
+        tier = Movie.user_tier(user)
+        if tier == Movie.BASIC:
+            return self.filter(min_tier=Movie.BASIC)
+        return self.filter(min_tier__lte=tier)
+
+
 class Movie(models.Model):
+    # Lowest user tier a movie is available to, stored in min_tier.
+    BASIC = 0
+    STANDARD = 1
+    PREMIUM = 2
+    TIER_CHOICES = (
+        (BASIC, "basic"),
+        (STANDARD, "standard"),
+        (PREMIUM, "premium"),
+    )
+    USER_TIERS = {
+        "basic": BASIC,
+        "standard": STANDARD,
+        "premium": PREMIUM,
+        "admin": PREMIUM,
+    }
+
+    # Fields whose values come from TMDB rather than from the admin.
+    TMDB_FIELDS = (
+        "title",
+        "overview",
+        "release_date",
+        "poster_url",
+        "backdrop_url",
+        "trailer_url",
+        "imdb_id",
+        "imdb_rating",
+        "tmdb_rating",
+        "genres",
+        "languages",
+        "production_countries",
+        "casts",
+        "director",
+    )
+
     tmdb_id = models.IntegerField(unique=True)
     imdb_id = models.CharField(max_length=50, null=True, blank=True)
     download_urls = JSONField(null=True, blank=True)
@@ -23,6 +103,83 @@ class Movie(models.Model):
     production_countries = JSONField()
     standard_user = models.BooleanField(default=False)
     premium_user = models.BooleanField(default=False)
+    tmdb_synced_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    modified_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Derived from standard_user and premium_user on every save.
+    min_tier = models.PositiveSmallIntegerField(choices=TIER_CHOICES, default=BASIC)
+    # Indexed copies of the genres, languages and production_countries JSON,
+    # kept in sync by movies_and_series.lookups.sync_lookup_tags.
+    genre_tags = models.ManyToManyField(Genre, related_name="movies", blank=True)
+    language_tags = models.ManyToManyField(Language, related_name="movies", blank=True)
+    production_country_tags = models.ManyToManyField(
+        ProductionCountry, related_name="movies", blank=True
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["release_date", "id"], name="movie_release_date_id_idx"
+            ),
+            models.Index(fields=["tmdb_rating", "id"], name="movie_tmdb_rating_id_idx"),
+            models.Index(
+                fields=["premium_user", "standard_user", "release_date"],
+                name="movie_tier_release_date_idx",
+            ),
+            # Listings of the tiers that cannot see the whole catalog.
+            models.Index(
+                fields=["release_date", "id"],
+                condition=models.Q(min_tier=0),
+                name="movie_basic_release_date_idx",
+            ),
+            models.Index(
+                fields=["release_date", "id"],
+                condition=models.Q(min_tier__lte=1),
+                name="movie_std_release_date_idx",
+            ),
+            # Cursor of the delta sync endpoint.
+            models.Index(fields=["modified_at", "id"], name="movie_modified_at_id_idx"),
+        ]
+
+    objects = MovieQuerySet.as_manager()
 
     def __str__(self):
         return self.title
+
+    @classmethod
+    def user_tier(cls, user):
+        if not user.is_authenticated:
+            return cls.BASIC
+        return cls.USER_TIERS.get(user.user_type, cls.BASIC)
+
+    def compute_min_tier(self):
+        if self.standard_user:
+            return self.STANDARD
+        if self.premium_user:
+            return self.PREMIUM
+        return self.BASIC
+
+    def save(self, *args, **kwargs):
+        self.min_tier = self.compute_min_tier()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            # Partial saves still move modified_at, which the delta sync
+            # endpoint relies on, and keep min_tier in line with the flags.
+            update_fields = {*update_fields, "modified_at"}
+            if {"standard_user", "premium_user"} & update_fields:
+                update_fields.add("min_tier")
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+
+
+class MovieTombstone(models.Model):
+    """
+    Records the deletion of a movie so that clients syncing the catalog with
+    /api/movies/changes/ learn about it. One row per tmdb_id, pruned after
+    MOVIE_TOMBSTONE_RETENTION_DAYS.
+    """
+
+    tmdb_id = models.IntegerField(unique=True)
+    deleted_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.tmdb_id} deleted at {self.deleted_at}"
@@ -0,0 +1,174 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db import connections
+from django.db.models import FloatField
+from django.db.models.expressions import Expression, RawSQL
+from rest_framework.filters import SearchFilter
+
+MOVIE_TABLE = "movies_and_series_movie"
+FTS_TABLE = "movies_and_series_movie_fts"
+
+# Title matches weigh more than overview matches in both backends.
+TITLE_WEIGHT = 10.0
+OVERVIEW_WEIGHT = 1.0
+
+POSTGRES_INSTALL_SQL = [
+    f"""
+    ALTER TABLE {MOVIE_TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(overview, '')), 'B')
+    ) STORED
+    """,
+    f"""
+    CREATE INDEX IF NOT EXISTS movie_search_vector_idx
+    ON {MOVIE_TABLE} USING gin (search_vector)
+    """,
+]
+POSTGRES_REMOVE_SQL = [
+    "DROP INDEX IF EXISTS movie_search_vector_idx",
+    f"ALTER TABLE {MOVIE_TABLE} DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_TRIGGERS = {
+    f"{FTS_TABLE}_ai": f"""
+        AFTER INSERT ON {MOVIE_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE} (rowid, title, overview)
+            VALUES (new.id, new.title, new.overview);
+        END
+    """,
+    f"{FTS_TABLE}_ad": f"""
+        AFTER DELETE ON {MOVIE_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, overview)
+            VALUES ('delete', old.id, old.title, old.overview);
+        END
+    """,
+    f"{FTS_TABLE}_au": f"""
+        AFTER UPDATE OF title, overview ON {MOVIE_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, overview)
+            VALUES ('delete', old.id, old.title, old.overview);
+            INSERT INTO {FTS_TABLE} (rowid, title, overview)
+            VALUES (new.id, new.title, new.overview);
+        END
+    """,
+}
+
+
+def install_search_index(connection):
+    """
+    Creates the full-text index over movie titles and overviews: a generated
+    tsvector column with a GIN index on PostgreSQL, or an FTS5 table kept up
+    to date by triggers on SQLite. Safe to call repeatedly.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            for sql in POSTGRES_INSTALL_SQL:
+                cursor.execute(sql)
+        elif connection.vendor == "sqlite":
+            # Rebuilding a table during a migration drops its triggers, so
+            # recreate any that are missing and reindex from the movie table.
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name IN (%s)"
+                % ", ".join("%s" for _ in SQLITE_TRIGGERS),
+                list(SQLITE_TRIGGERS),
+            )
+            if len(cursor.fetchall()) == len(SQLITE_TRIGGERS):
+                return
+            cursor.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+                    title, overview, content='{MOVIE_TABLE}', content_rowid='id',
+                    tokenize='porter unicode61 remove_diacritics 2'
+                )
+                """)
+            for name, body in SQLITE_TRIGGERS.items():
+                cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def remove_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            for sql in POSTGRES_REMOVE_SQL:
+                cursor.execute(sql)
+        elif connection.vendor == "sqlite":
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class TableColumn(Expression):
+    """
+    A column of the queried table that is not a model field, such as the
+    generated search_vector. It is qualified with the alias the query gives
+    the table, which differs from the table name once the queryset is used
+    as a subquery.
+    """
+
+    def __init__(self, column, output_field):
+        super().__init__(output_field=output_field)
+        self.column = column
+
+    def as_sql(self, compiler, connection):
+        alias = compiler.query.get_initial_alias()
+        return (
+            "%s.%s"
+            % (
+                compiler.quote_name_unless_alias(alias),
+                connection.ops.quote_name(self.column),
+            ),
+            [],
+        )
+
+
+class PostgresSearchBackend:
+    def search(self, queryset, terms):
+        vector = TableColumn("search_vector", SearchVectorField())
+        query = SearchQuery(" ".join(terms), config="english")
+        return (
+            queryset.alias(search_vector=vector)
+            .filter(search_vector=query)
+            .annotate(search_rank=SearchRank(vector, query))
+        )
+
+
+class SQLiteSearchBackend:
+    def search(self, queryset, terms):
+        # Quote every term so FTS5 query syntax in user input is matched
+        # literally; the terms are ANDed together.
+        query = " ".join('"%s"' % term.replace('"', '""') for term in terms)
+        matches = RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [query]
+        )
+        # bm25() is lower for better matches, so negate it to rank descending.
+        rank = RawSQL(
+            f"""
+            SELECT -bm25({FTS_TABLE}, {TITLE_WEIGHT}, {OVERVIEW_WEIGHT})
+            FROM {FTS_TABLE}
+            WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {MOVIE_TABLE}.id
+            """,
+            [query],
+            output_field=FloatField(),
+        )
+        return queryset.filter(id__in=matches).annotate(search_rank=rank)
+
+
+SEARCH_BACKENDS = {
+    "postgresql": PostgresSearchBackend(),
+    "sqlite": SQLiteSearchBackend(),
+}
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    Movie search over title and overview, served by the full-text index of
+    the database and ordered by relevance. Falls back to DRF's SearchFilter
+    on databases without a full-text backend.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        backend = SEARCH_BACKENDS.get(connections[queryset.db].vendor)
+        if backend is None:
+            return super().filter_queryset(request, queryset, view)
+        return backend.search(queryset, terms).order_by("-search_rank", "-id")
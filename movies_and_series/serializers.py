@@ -1,9 +1,71 @@
+from django.conf import settings
 from rest_framework import serializers
 
 from .models import Movie
 
 
-class MovieSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Drops every field not listed in the "fields" entry of the serializer
+    context, which the views fill from the ?fields= query parameter.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get("fields")
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class ValuesRowSerializer:
+    """
+    Read-only fast path for listings. Produces the same representation as
+    `serializer_class` from queryset.values() rows, with one precomputed
+    converter per field instead of a serializer built per instance.
+    """
+
+    # Converters equivalent to the DRF fields' to_representation().
+    CONVERTERS = {
+        serializers.IntegerField: int,
+        serializers.FloatField: float,
+        serializers.BooleanField: bool,
+        serializers.CharField: str,
+        serializers.URLField: str,
+        serializers.EmailField: str,
+        serializers.JSONField: None,
+    }
+
+    def __init__(self, serializer_class, fields=None):
+        serializer = serializer_class(context={"fields": fields})
+        model = serializer_class.Meta.model
+        columns = {field.name for field in model._meta.concrete_fields}
+        self.accessors = []
+        for name, field in serializer.fields.items():
+            # Write-only fields and fields without a model column (such as
+            # fetch_latest) are skipped by the serializer too.
+            if field.write_only or field.source not in columns:
+                continue
+            converter = self.CONVERTERS.get(type(field), field.to_representation)
+            if isinstance(field, serializers.JSONField) and field.binary:
+                converter = field.to_representation
+            self.accessors.append((name, field.source, converter))
+        self.columns = [source for _, source, _ in self.accessors]
+
+    def to_representation(self, row):
+        data = {}
+        for name, source, converter in self.accessors:
+            value = row[source]
+            if value is not None and converter is not None:
+                value = converter(value)
+            data[name] = value
+        return data
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+class MovieSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     fetch_latest = serializers.BooleanField(required=False)
 
     class Meta:
@@ -48,3 +110,41 @@ class MovieSerializer(serializers.ModelSerializer):
             "trailer_url": {"required": False},
             "production_countries": {"required": False},
         }
+
+
+class MovieListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Compact representation used by the movie list, carrying only what browse
+    pages render. The full payload is served by the detail endpoint.
+    """
+
+    class Meta:
+        model = Movie
+        fields = [
+            "tmdb_id",
+            "title",
+            "poster_url",
+            "tmdb_rating",
+            "genres",
+            "release_date",
+            "standard_user",
+            "premium_user",
+        ]
+
+
+class MovieIngestSerializer(serializers.Serializer):
+    tmdb_id = serializers.IntegerField()
+    download_urls = serializers.JSONField(required=False, allow_null=True, default=None)
+    streaming_urls = serializers.JSONField(
+        required=False, allow_null=True, default=None
+    )
+    standard_user = serializers.BooleanField(required=False, default=False)
+    premium_user = serializers.BooleanField(required=False, default=False)
+
+
+class MovieBatchSerializer(serializers.Serializer):
+    tmdb_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=settings.MOVIE_BATCH_MAX_SIZE,
+    )
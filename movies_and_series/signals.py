@@ -0,0 +1,76 @@
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import Signal, receiver
+
+from .caching import bump_catalog_version
+from .changes import record_tombstones
+from .facets import facet_index
+from .lookups import LOOKUP_FIELDS, sync_lookup_tags
+from .models import Movie
+from .search import FTS_TABLE, install_search_index
+from .similar import similarity_index
+from .suggest import title_index
+
+# Sent once a transaction that wrote movies commits, with the new catalog
+# `version`, the saved `movies`, the tmdb ids of the `created` ones among
+# them and the tmdb ids of the `deleted` ones.
+catalog_changed = Signal()
+
+
+def notify_catalog_changed(movies=(), deleted=(), created=()):
+    """
+    Bumps the catalog version and sends catalog_changed when the current
+    transaction commits. Bulk writes, which skip model signals, call this
+    directly.
+    """
+    movies = list(movies)
+    deleted = list(deleted)
+    created = list(created)
+
+    def send():
+        version = bump_catalog_version()
+        catalog_changed.send(
+            sender=Movie,
+            version=version,
+            movies=movies,
+            deleted=deleted,
+            created=created,
+        )
+
+    transaction.on_commit(send, robust=True)
+
+
+@receiver(post_save, sender=Movie)
+def sync_movie_lookup_tags(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not LOOKUP_FIELDS.keys() & update_fields:
+        return
+    sync_lookup_tags([instance])
+
+
+@receiver(post_save, sender=Movie)
+def movie_saved(sender, instance, created, **kwargs):
+    notify_catalog_changed(
+        movies=[instance], created=[instance.tmdb_id] if created else []
+    )
+
+
+@receiver(post_delete, sender=Movie)
+def movie_deleted(sender, instance, **kwargs):
+    record_tombstones([instance.tmdb_id])
+    notify_catalog_changed(deleted=[instance.tmdb_id])
+
+
+@receiver(catalog_changed)
+def update_catalog_indexes(sender, version, movies, deleted, **kwargs):
+    for index in (title_index, similarity_index, facet_index):
+        index.catalog_changed(version, movies, deleted)
+
+
+@receiver(post_migrate)
+def repair_search_index(sender, using, **kwargs):
+    # SQLite drops the FTS triggers whenever a migration rebuilds the movie
+    # table; reinstall them once the index exists.
+    connection = connections[using]
+    if connection.vendor == "sqlite" and sender.name == "movies_and_series":
+        if FTS_TABLE in connection.introspection.table_names():
+            install_search_index(connection)
@@ -0,0 +1,155 @@
+import zlib
+
+import numpy as np
+from django.conf import settings
+
+from .indexes import CatalogIndex
+from .models import LookupTag, Movie
+
+FEATURE_FIELDS = (
+    "tmdb_id",
+    "genres",
+    "languages",
+    "casts",
+    "director",
+    "tmdb_rating",
+    "min_tier",
+)
+
+# Relative weight of each kind of feature in a movie's vector.
+FEATURE_WEIGHTS = {
+    "genre": 1.0,
+    "language": 0.5,
+    "cast": 0.5,
+    "director": 1.0,
+    "rating": 0.5,
+}
+
+
+def movie_features(movie):
+    """
+    Returns the weighted categorical features of a movie, as a dictionary
+    keyed by "kind:normalized name".
+    """
+    names = {
+        "genre": movie["genres"] or [],
+        "language": movie["languages"] or [],
+        "cast": [
+            cast.get("name") for cast in movie["casts"] or [] if isinstance(cast, dict)
+        ],
+        "director": [(movie["director"] or {}).get("name")],
+    }
+    return {
+        f"{kind}:{LookupTag.normalize(name)}": FEATURE_WEIGHTS[kind]
+        for kind, values in names.items()
+        for name in values
+        if isinstance(name, str) and name.strip()
+    }
+
+
+class SimilarityIndex(CatalogIndex):
+    """
+    Feature vectors of every movie, held as the rows of a float32 NumPy
+    matrix and compared by cosine similarity. Categorical features (genres,
+    languages, cast and director) are multi-hot, hashed into a fixed number
+    of columns so the matrix stays small however many people the catalog
+    credits; the last column holds the normalized tmdb_rating. Rows are L2
+    normalized, so a single matrix-vector product scores a movie against the
+    whole catalog.
+    """
+
+    def __init__(self, dimensions):
+        super().__init__()
+        self.dimensions = dimensions
+        self._reset(capacity=0)
+
+    def _reset(self, capacity):
+        self._matrix = np.zeros((capacity, self.dimensions + 1), dtype=np.float32)
+        # The min_tier of the movie of every row.
+        self._tiers = np.zeros(capacity, dtype=np.int8)
+        self._rows = {}
+        self._tmdb_ids = []
+        self._free = []
+
+    def vector(self, movie):
+        vector = np.zeros(self.dimensions + 1, dtype=np.float32)
+        for feature, weight in movie_features(movie).items():
+            vector[zlib.crc32(feature.encode()) % self.dimensions] += weight
+        vector[-1] = (movie["tmdb_rating"] or 0) / 10 * FEATURE_WEIGHTS["rating"]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def rebuild(self):
+        movies = list(Movie.objects.values(*FEATURE_FIELDS).iterator())
+        self._reset(capacity=len(movies))
+        for movie in movies:
+            self._set(movie["tmdb_id"], self.vector(movie), movie["min_tier"])
+
+    def apply(self, movies, deleted):
+        for tmdb_id in deleted:
+            self._remove(tmdb_id)
+        for movie in movies:
+            row = {name: getattr(movie, name) for name in FEATURE_FIELDS}
+            self._set(movie.tmdb_id, self.vector(row), movie.min_tier)
+
+    def _set(self, tmdb_id, vector, tier):
+        row = self._rows.get(tmdb_id)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+                self._tmdb_ids[row] = tmdb_id
+            else:
+                row = len(self._tmdb_ids)
+                self._tmdb_ids.append(tmdb_id)
+                if row == len(self._matrix):
+                    # Grow geometrically so appends stay amortized O(1).
+                    grown = np.zeros(
+                        (max(16, 2 * row), self.dimensions + 1), dtype=np.float32
+                    )
+                    grown[:row] = self._matrix
+                    self._matrix = grown
+                    tiers = np.zeros(len(grown), dtype=np.int8)
+                    tiers[:row] = self._tiers
+                    self._tiers = tiers
+            self._rows[tmdb_id] = row
+        self._matrix[row] = vector
+        self._tiers[row] = tier
+
+    def _remove(self, tmdb_id):
+        row = self._rows.pop(tmdb_id, None)
+        if row is not None:
+            # A zero row scores 0 against everything, so it is never returned.
+            self._matrix[row] = 0
+            self._tmdb_ids[row] = None
+            self._free.append(row)
+
+    def similar(self, tmdb_id, limit, max_tier=Movie.PREMIUM):
+        """
+        Returns up to `limit` (tmdb_id, score) pairs of the movies most
+        similar to the given one that are available to the `max_tier` user
+        tier, best first, or None if the movie is not indexed or available.
+        """
+        with self._lock:
+            row = self._rows.get(tmdb_id)
+            if row is None or self._tiers[row] > max_tier:
+                return None
+            size = len(self._tmdb_ids)
+            matrix = self._matrix[:size]
+            scores = matrix @ matrix[row]
+            scores[row] = 0
+            scores[self._tiers[:size] > max_tier] = 0
+            limit = min(limit, len(scores))
+            if limit <= 0:
+                return []
+            # argpartition finds the top `limit` in linear time; only those
+            # few are then sorted.
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [
+                (self._tmdb_ids[i], round(float(scores[i]), 4))
+                for i in top
+                if scores[i] > 0
+            ]
+
+
+similarity_index = SimilarityIndex(dimensions=settings.MOVIE_SIMILAR_DIMENSIONS)
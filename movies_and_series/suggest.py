@@ -0,0 +1,107 @@
+import heapq
+from bisect import bisect_left, insort
+
+from cinecraze_server.text import normalize_title
+
+from .indexes import CatalogIndex
+from .models import Movie
+
+SUGGESTION_FIELDS = ("tmdb_id", "title", "poster_url", "release_date", "tmdb_rating")
+INDEXED_FIELDS = (*SUGGESTION_FIELDS, "min_tier")
+
+
+def title_keys(normalized):
+    """
+    Returns the keys a title is indexed under: the title itself and every
+    suffix starting at a word, so "dark knight" also matches "The Dark Knight".
+    """
+    words = normalized.split()
+    return {" ".join(words[i:]) for i in range(len(words))}
+
+
+class TitleIndex(CatalogIndex):
+    """
+    Prefix index over normalized movie titles, kept as a sorted list of
+    (key, tmdb_id) pairs searched with bisect. Matches are ranked by
+    tmdb_rating, then release date, with titles starting with the query
+    first.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._entries = []
+        self._movies = {}
+
+    def rebuild(self):
+        entries = []
+        movies = {}
+        for row in Movie.objects.values(*INDEXED_FIELDS).iterator():
+            document = self._document(row)
+            movies[row["tmdb_id"]] = document
+            entries.extend((key, row["tmdb_id"]) for key in document[2])
+        entries.sort()
+        self._entries = entries
+        self._movies = movies
+
+    def apply(self, movies, deleted):
+        for tmdb_id in deleted:
+            self._remove(tmdb_id)
+        for movie in movies:
+            self._remove(movie.tmdb_id)
+            document = self._document(
+                {name: getattr(movie, name) for name in INDEXED_FIELDS}
+            )
+            self._movies[movie.tmdb_id] = document
+            for key in document[2]:
+                insort(self._entries, (key, movie.tmdb_id))
+
+    def _document(self, row):
+        release_date = Movie._meta.get_field("release_date").to_python(
+            row["release_date"]
+        )
+        normalized = normalize_title(row["title"])
+        rank = (
+            row["tmdb_rating"] or 0,
+            release_date.toordinal() if release_date else 0,
+        )
+        suggestion = {
+            **{name: row[name] for name in SUGGESTION_FIELDS},
+            "release_date": release_date.isoformat() if release_date else None,
+        }
+        return normalized, rank, title_keys(normalized), suggestion, row["min_tier"]
+
+    def _remove(self, tmdb_id):
+        document = self._movies.pop(tmdb_id, None)
+        if document is None:
+            return
+        for key in document[2]:
+            i = bisect_left(self._entries, (key, tmdb_id))
+            if i < len(self._entries) and self._entries[i] == (key, tmdb_id):
+                del self._entries[i]
+
+    def search(self, query, limit, max_tier=Movie.PREMIUM):
+        """
+        Returns up to `limit` suggestions for titles matching `query`, among
+        the movies available to the `max_tier` user tier.
+        """
+        prefix = normalize_title(query)
+        if not prefix or limit <= 0:
+            return []
+        with self._lock:
+            start = bisect_left(self._entries, (prefix,))
+            end = bisect_left(self._entries, (prefix + "\U0010ffff",), start)
+            tmdb_ids = {tmdb_id for _, tmdb_id in self._entries[start:end]}
+            documents = [
+                self._movies[tmdb_id]
+                for tmdb_id in tmdb_ids
+                if self._movies[tmdb_id][4] <= max_tier
+            ]
+        best = heapq.nlargest(
+            limit,
+            documents,
+            key=lambda document: (document[0].startswith(prefix), *document[1]),
+        )
+        return [document[3] for document in best]
+
+
+title_index = TitleIndex()
@@ -1,3 +1,1083 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core import mail
+from django.db import connection
+from django.db.backends.postgresql.base import (
+    DatabaseWrapper as PostgresDatabaseWrapper,
+)
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from cine_request.models import CineRequest
+from outbox.mail import send_outbox
+from outbox.models import OutboxEmail
+from user_account.models import CustomUser
+
+from .caching import bump_catalog_version, get_catalog_cache
+from .changes import encode_cursor
+from .ingest import refresh_movies
+from .models import Movie
+from .search import PostgresSearchBackend
+from .facets import facet_index
+from .similar import similarity_index
+from .suggest import title_index
+from .serializers import MovieListSerializer, MovieSerializer, ValuesRowSerializer
+from .tmdb import (
+    TokenBucket,
+    fetch_movie_data_from_tmdb,
+    parse_movie_payload,
+    tmdb_cache,
+)
+
+
+def tmdb_movie_payload(tmdb_id, **overrides):
+    payload = {
+        "id": tmdb_id,
+        "title": f"Movie {tmdb_id}",
+        "overview": "An overview.",
+        "release_date": "2024-01-01",
+        "poster_path": "/poster.jpg",
+        "backdrop_path": "/backdrop.jpg",
+        "imdb_id": f"tt{tmdb_id}",
+        "vote_average": 7.5,
+        "genres": [{"name": "Action"}, {"name": "Drama"}],
+        "spoken_languages": [{"name": "English"}],
+        "production_countries": [{"name": "United States of America"}],
+        "credits": {
+            "cast": [{"name": "Actor", "character": "Hero", "profile_path": "/a.jpg"}],
+            "crew": [{"name": "Director", "job": "Director", "profile_path": None}],
+        },
+        "videos": {"results": [{"site": "YouTube", "type": "Trailer", "key": "abc"}]},
+    }
+    payload.update(overrides)
+    return payload
+
+
+def unsaved_movie(tmdb_id, **fields):
+    defaults = {
+        "title": f"Movie {tmdb_id}",
+        "overview": "An overview.",
+        "languages": ["English"],
+        "casts": [],
+        "director": {},
+        "genres": ["Action"],
+        "release_date": "2024-01-01",
+        "production_countries": ["United States of America"],
+        "tmdb_rating": 7.5,
+    }
+    defaults.update(fields)
+    return Movie(tmdb_id=tmdb_id, **defaults)
+
+
+def create_movie(tmdb_id, **fields):
+    movie = unsaved_movie(tmdb_id, **fields)
+    movie.save()
+    return movie
+
+
+def client_for(user_type):
+    user = CustomUser.objects.filter(email=f"{user_type}@example.com").first()
+    if user is None:
+        user = CustomUser.objects.create_user(
+            name=user_type,
+            email=f"{user_type}@example.com",
+            password="password",
+            user_type=user_type,
+        )
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+# Catalog caching is only enabled on caches shared by every worker.
+SHARED_CATALOG_CACHE = {
+    **settings.CACHES,
+    "catalog": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(tempfile.gettempdir(), "cinecraze-test-catalog"),
+    },
+}
+
+
+@override_settings(CACHES=SHARED_CATALOG_CACHE, CATALOG_CACHE_ALIAS="catalog")
+class CatalogTestCase(TestCase):
+    def setUp(self):
+        get_catalog_cache().clear()
+        tmdb_cache.clear()
+        for index in (title_index, similarity_index, facet_index):
+            index.reset()
+
+
+class StubTMDBServer:
+    """
+    Minimal local stand-in for the TMDB movie endpoint. Every request waits
+    `latency` seconds to mimic the round trip to the real API.
+    """
+
+    def __init__(self, latency=0.0, payloads=None):
+        self.latency = latency
+        self.payloads = payloads or {}
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                stub.requests.append((url.path, parse_qs(url.query)))
+                time.sleep(stub.latency)
+                tmdb_id = int(url.path.rstrip("/").split("/")[-1])
+                payload = stub.payloads.get(tmdb_id, tmdb_movie_payload(tmdb_id))
+                body = json.dumps(payload).encode()
+                # A None payload stands for an id TMDB does not know.
+                self.send_response(200 if payload is not None else 404)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except BrokenPipeError:
+                    # The client gave up waiting (timeout tests).
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/3"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TMDBClientTests(CatalogTestCase):
+    def test_fetch_uses_single_request_with_appended_credits_and_videos(self):
+        with StubTMDBServer() as stub, override_settings(
+            TMDB_API_BASE_URL=stub.base_url
+        ):
+            movie_data = fetch_movie_data_from_tmdb(550)
+
+        self.assertEqual(len(stub.requests), 1)
+        path, query = stub.requests[0]
+        self.assertEqual(path, "/3/movie/550")
+        self.assertEqual(query["append_to_response"], ["credits,videos"])
+        self.assertEqual(movie_data["title"], "Movie 550")
+        self.assertEqual(movie_data["genres"], ["Action", "Drama"])
+        self.assertEqual(movie_data["casts"][0]["character"], "Hero")
+        self.assertEqual(movie_data["director"]["name"], "Director")
+        self.assertEqual(
+            movie_data["trailer_url"], "https://www.youtube.com/watch?v=abc"
+        )
+
+    def test_fetch_costs_one_round_trip(self):
+        # The previous client issued three sequential requests per movie.
+        latency = 0.2
+        with StubTMDBServer(latency=latency) as stub, override_settings(
+            TMDB_API_BASE_URL=stub.base_url
+        ):
+            started = time.perf_counter()
+            fetch_movie_data_from_tmdb(550)
+            elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 2 * latency)
+
+    def test_fetch_returns_none_on_timeout(self):
+        with StubTMDBServer(latency=0.5) as stub, override_settings(
+            TMDB_API_BASE_URL=stub.base_url, TMDB_TIMEOUT=0.1
+        ):
+            self.assertIsNone(fetch_movie_data_from_tmdb(550))
+
+    def test_concurrent_fetches_share_one_request(self):
+        with StubTMDBServer(latency=0.2) as stub, override_settings(
+            TMDB_API_BASE_URL=stub.base_url
+        ):
+            with ThreadPoolExecutor(max_workers=5) as executor:
+                results = list(
+                    executor.map(
+                        lambda tmdb_id: fetch_movie_data_from_tmdb(
+                            tmdb_id, refresh=True
+                        ),
+                        [550] * 5,
+                    )
+                )
+
+        self.assertEqual(len(stub.requests), 1)
+        self.assertTrue(all(result == results[0] for result in results))
+
+    def test_repeated_fetch_is_served_from_cache(self):
+        with StubTMDBServer() as stub, override_settings(
+            TMDB_API_BASE_URL=stub.base_url
+        ):
+            first = fetch_movie_data_from_tmdb(550)
+            second = fetch_movie_data_from_tmdb(550)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(stub.requests), 1)
+        self.assertEqual(tmdb_cache.stats()["local_hits"], 1)
+        self.assertEqual(tmdb_cache.stats()["misses"], 1)
+
+    def test_refresh_bypasses_cache(self):
+        with StubTMDBServer() as stub, override_settings(
+            TMDB_API_BASE_URL=stub.base_url
+        ):
+            fetch_movie_data_from_tmdb(550)
+            stub.payloads[550] = tmdb_movie_payload(550, title="Renamed")
+            movie_data = fetch_movie_data_from_tmdb(550, refresh=True)
+
+        self.assertEqual(movie_data["title"], "Renamed")
+        self.assertEqual(len(stub.requests), 2)
+        self.assertEqual(tmdb_cache.get(550)["title"], "Renamed")
+
+
+class AddMovieTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def test_duplicate_add_updates_existing_movie(self):
+        with StubTMDBServer() as stub, override_settings(
+            TMDB_API_BASE_URL=stub.base_url
+        ):
+            first = self.client.post(
+                reverse("add_movie"), {"tmdb_id": 550}, format="json"
+            )
+            second = self.client.post(
+                reverse("add_movie"),
+                {"tmdb_id": 550, "premium_user": True},
+                format="json",
+            )
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(len(stub.requests), 1)
+        self.assertEqual(Movie.objects.count(), 1)
+        self.assertTrue(Movie.objects.get(tmdb_id=550).premium_user)
+
+    def test_re_add_without_flags_keeps_them(self):
+        with StubTMDBServer() as stub, override_settings(
+            TMDB_API_BASE_URL=stub.base_url
+        ):
+            self.client.post(
+                reverse("add_movie"),
+                {
+                    "tmdb_id": 550,
+                    "premium_user": True,
+                    "download_urls": {"720p": "https://e.com/550"},
+                },
+                format="json",
+            )
+            response = self.client.post(
+                reverse("add_movie"), {"tmdb_id": 550}, format="json"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        movie = Movie.objects.get(tmdb_id=550)
+        self.assertTrue(movie.premium_user)
+        self.assertEqual(movie.min_tier, Movie.PREMIUM)
+        self.assertEqual(movie.download_urls, {"720p": "https://e.com/550"})
+        response = APIClient().get("/api/movies/")
+        self.assertEqual(response.data["results"], [])
+
+    def test_add_fulfils_matching_cine_requests(self):
+        by_id = CineRequest.objects.create(
+            name="Ann", email="ann@example.com", message="Please", tmdb_id=550
+        )
+        by_title = CineRequest.objects.create(
+            name="Bob", email="bob@example.com", message="Movie 550!"
+        )
+        other = CineRequest.objects.create(
+            name="Cid", email="cid@example.com", message="Movie 551"
+        )
+
+        with StubTMDBServer() as stub, override_settings(
+            TMDB_API_BASE_URL=stub.base_url
+        ), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("add_movie"), {"tmdb_id": 550}, format="json"
+            )
+
+        self.assertEqual(response.status_code, 201)
+        solved = set(
+            CineRequest.objects.filter(solved=True).values_list("pk", flat=True)
+        )
+        self.assertEqual(solved, {by_id.pk, by_title.pk})
+        self.assertEqual(
+            sorted(email.to[0] for email in OutboxEmail.objects.all()),
+            ["ann@example.com", "bob@example.com"],
+        )
+        self.assertFalse(CineRequest.objects.get(pk=other.pk).solved)
+        send_outbox()
+        self.assertIn("Ann", mail.outbox[0].alternatives[0][0])
+
+        # Updating a movie that was already added fulfils nothing.
+        late = CineRequest.objects.create(
+            name="Dee", email="dee@example.com", message="Please", tmdb_id=550
+        )
+        with StubTMDBServer() as stub, override_settings(
+            TMDB_API_BASE_URL=stub.base_url
+        ), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("add_movie"), {"tmdb_id": 550}, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(CineRequest.objects.get(pk=late.pk).solved)
+
+
+class BulkAddMoviesTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def test_bulk_add_reports_status_per_tmdb_id(self):
+        create_movie(1, title="Stale title")
+        entries = [
+            {"tmdb_id": 1},
+            {"tmdb_id": 2, "streaming_urls": ["https://example.com/2"]},
+            {"tmdb_id": 3, "premium_user": True},
+            {"tmdb_id": "abc"},
+        ]
+        with StubTMDBServer() as stub, override_settings(
+            TMDB_API_BASE_URL=stub.base_url
+        ):
+            response = self.client.post(
+                reverse("bulk_add_movies"), entries, format="json"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["updated", "created", "created", "failed"],
+        )
+        self.assertEqual(len(stub.requests), 3)
+        self.assertEqual(Movie.objects.count(), 3)
+        self.assertEqual(Movie.objects.get(tmdb_id=1).title, "Movie 1")
+        movie = Movie.objects.get(tmdb_id=2)
+        self.assertEqual(movie.title, "Movie 2")
+        self.assertEqual(movie.streaming_urls, ["https://example.com/2"])
+        self.assertTrue(Movie.objects.get(tmdb_id=3).premium_user)
+
+
+class RefreshMoviesTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+
+    def test_refresh_updates_least_recently_synced_movies(self):
+        synced_at = timezone.now()
+        stale = create_movie(1, title="Movie 1", tmdb_rating=5.0)
+        unchanged = create_movie(
+            2,
+            **parse_movie_payload(tmdb_movie_payload(2)),
+            tmdb_synced_at=synced_at - timezone.timedelta(days=2),
+        )
+        fresh = create_movie(3, title="Old title", tmdb_synced_at=synced_at)
+
+        with StubTMDBServer() as stub, override_settings(
+            TMDB_API_BASE_URL=stub.base_url
+        ):
+            counts = refresh_movies(limit=2)
+
+        self.assertEqual(
+            counts, {"checked": 2, "updated": 1, "unchanged": 1, "failed": 0}
+        )
+        self.assertEqual(
+            sorted(path for path, _ in stub.requests), ["/3/movie/1", "/3/movie/2"]
+        )
+        stale.refresh_from_db()
+        self.assertEqual(stale.tmdb_rating, 7.5)
+        self.assertIsNotNone(stale.tmdb_synced_at)
+        unchanged.refresh_from_db()
+        self.assertGreater(unchanged.tmdb_synced_at, synced_at)
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.title, "Old title")
+
+    def test_failed_fetches_do_not_block_the_queue(self):
+        dead = create_movie(1)
+        alive = create_movie(
+            2, tmdb_synced_at=timezone.now() - timezone.timedelta(days=2)
+        )
+
+        with StubTMDBServer(payloads={1: None}) as stub, override_settings(
+            TMDB_API_BASE_URL=stub.base_url
+        ):
+            counts = refresh_movies(limit=1)
+            self.assertEqual(counts["failed"], 1)
+            counts = refresh_movies(limit=1)
+
+        self.assertEqual(
+            counts, {"checked": 1, "updated": 1, "unchanged": 0, "failed": 0}
+        )
+        self.assertEqual(
+            [path for path, _ in stub.requests], ["/3/movie/1", "/3/movie/2"]
+        )
+        dead.refresh_from_db()
+        self.assertIsNotNone(dead.tmdb_synced_at)
+        alive.refresh_from_db()
+        self.assertEqual(alive.tmdb_rating, 7.5)
+
+    def test_token_bucket_limits_request_rate(self):
+        bucket = TokenBucket(rate=20, capacity=1)
+        started = time.perf_counter()
+        for _ in range(5):
+            bucket.acquire()
+        self.assertGreaterEqual(time.perf_counter() - started, 4 / 20)
+
+
+class MovieListPaginationTests(CatalogTestCase):
+    def test_list_is_cursor_paginated_newest_first(self):
+        for tmdb_id in range(1, 6):
+            create_movie(tmdb_id, release_date=f"2024-01-0{tmdb_id}")
+        client = APIClient()
+
+        response = client.get("/api/movies/", {"page_size": 2})
+        self.assertEqual(
+            [movie["tmdb_id"] for movie in response.data["results"]], [5, 4]
+        )
+        response = client.get(response.data["next"])
+        self.assertEqual(
+            [movie["tmdb_id"] for movie in response.data["results"]], [3, 2]
+        )
+
+    def test_ordering_by_rating_skips_unrated_movies(self):
+        create_movie(1, tmdb_rating=6.0)
+        create_movie(2, tmdb_rating=None)
+        create_movie(3, tmdb_rating=8.0)
+        create_movie(4, tmdb_rating=7.0)
+        client = APIClient()
+
+        response = client.get("/api/movies/", {"ordering": "-tmdb_rating"})
+        self.assertEqual(
+            [movie["tmdb_id"] for movie in response.data["results"]], [3, 4, 1]
+        )
+        response = client.get(
+            "/api/movies/", {"ordering": "tmdb_rating", "page_size": 2}
+        )
+        response = client.get(response.data["next"])
+        self.assertEqual([movie["tmdb_id"] for movie in response.data["results"]], [3])
+
+    def test_ordering_is_limited_to_indexed_fields(self):
+        create_movie(1, title="B", release_date="2024-01-01")
+        create_movie(2, title="A", release_date="2024-02-01")
+        response = APIClient().get("/api/movies/", {"ordering": "title"})
+        self.assertEqual(
+            [movie["tmdb_id"] for movie in response.data["results"]], [2, 1]
+        )
+
+
+class MovieLookupFilterTests(CatalogTestCase):
+    def test_genre_filter_matches_whole_names_from_lookup_table(self):
+        create_movie(1, genres=["Drama"])
+        create_movie(2, genres=["Melodrama"])
+        create_movie(3, genres=["Action", "Comedy"])
+        client = APIClient()
+
+        response = client.get("/api/movies/", {"genres": "drama"})
+        self.assertEqual([movie["tmdb_id"] for movie in response.data["results"]], [1])
+
+        response = client.get("/api/movies/", {"genres": "Action,Drama"})
+        self.assertEqual(
+            sorted(movie["tmdb_id"] for movie in response.data["results"]), [1, 3]
+        )
+
+    def test_lookup_tags_follow_updates(self):
+        movie = create_movie(1, languages=["English"])
+        movie.languages = ["French"]
+        movie.save()
+        self.assertEqual(
+            list(movie.language_tags.values_list("name", flat=True)), ["French"]
+        )
+
+
+class MovieSearchTests(CatalogTestCase):
+    def test_search_ranks_title_matches_first(self):
+        create_movie(1, title="Heat", overview="A heist crew in Los Angeles.")
+        create_movie(2, title="The Heist", overview="A thriller.")
+        create_movie(3, title="Up", overview="A balloon adventure.")
+
+        response = APIClient().get("/api/movies/", {"search": "heist"})
+
+        self.assertEqual(
+            [movie["tmdb_id"] for movie in response.data["results"]], [2, 1]
+        )
+
+    def test_search_index_follows_updates_and_deletes(self):
+        movie = create_movie(1, title="Heat")
+        movie.title = "Ronin"
+        with self.captureOnCommitCallbacks(execute=True):
+            movie.save()
+        client = APIClient()
+
+        self.assertEqual(
+            client.get("/api/movies/", {"search": "heat"}).data["results"], []
+        )
+        self.assertEqual(
+            len(client.get("/api/movies/", {"search": "ronin"}).data["results"]), 1
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            movie.delete()
+        self.assertEqual(
+            client.get("/api/movies/", {"search": "ronin"}).data["results"], []
+        )
+
+    def test_search_input_is_not_parsed_as_query_syntax(self):
+        create_movie(1, title="Heat")
+        response = APIClient().get("/api/movies/", {"search": 'heat" OR *'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_postgres_search_resolves_the_table_alias_in_subqueries(self):
+        postgres = PostgresDatabaseWrapper(
+            {**connection.settings_dict, "ENGINE": "django.db.backends.postgresql"}
+        )
+        searched = PostgresSearchBackend().search(Movie.objects.all(), ["heat"])
+        queryset = Movie.objects.filter(id__in=searched.order_by().values("id"))
+
+        sql, params = queryset.query.get_compiler(connection=postgres).as_sql()
+        self.assertIn('WHERE U0."search_vector" @@ (plainto_tsquery(', sql)
+        self.assertNotIn('"movies_and_series_movie"."search_vector"', sql)
+        self.assertEqual(params, ("english", "heat"))
+
+
+class MovieRepresentationTests(CatalogTestCase):
+    def test_list_uses_compact_representation(self):
+        create_movie(1)
+        client = APIClient()
+
+        listed = client.get("/api/movies/").data["results"][0]
+        self.assertEqual(set(listed), set(MovieListSerializer.Meta.fields))
+        detail = client.get(f"/api/movies/{Movie.objects.get().pk}/").data
+        self.assertIn("casts", detail)
+        self.assertIn("download_urls", detail)
+
+    def test_fields_parameter_selects_sparse_fieldset(self):
+        create_movie(1)
+        client = APIClient()
+
+        response = client.get("/api/movies/", {"fields": "title,overview,nope"})
+        self.assertEqual(
+            response.data["results"], [{"title": "Movie 1", "overview": "An overview."}]
+        )
+        response = client.get(
+            f"/api/movies/{Movie.objects.get().pk}/", {"fields": "tmdb_id"}
+        )
+        self.assertEqual(response.data, {"tmdb_id": 1})
+
+    def test_fields_parameter_without_readable_fields_is_rejected(self):
+        create_movie(1)
+        client = APIClient()
+
+        for path in ("/api/movies/", f"/api/movies/{Movie.objects.get().pk}/"):
+            response = client.get(path, {"fields": "bogus"})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("title", response.data["fields"])
+
+
+class CatalogResponseCacheTests(CatalogTestCase):
+    def test_repeated_reads_are_served_from_cache_until_a_write(self):
+        create_movie(1)
+        client = APIClient()
+
+        first = client.get("/api/movies/", {"genres": "Action"})
+        with self.assertNumQueries(0):
+            second = client.get("/api/movies/", {"genres": "Action"})
+        self.assertEqual(first.content, second.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_movie(2)
+        response = client.get("/api/movies/", {"genres": "Action"})
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    @override_settings(CATALOG_CACHE_ALIAS="default")
+    def test_process_local_cache_is_not_used_for_responses(self):
+        create_movie(1)
+        client = APIClient()
+
+        etag = client.get("/api/movies/")["ETag"]
+        # Another worker's write, which never reaches this process's cache.
+        Movie.objects.bulk_create([unsaved_movie(2)])
+        response = client.get("/api/movies/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+
+class MovieConditionalGetTests(CatalogTestCase):
+    def test_unchanged_catalog_answers_304_without_queries(self):
+        movie = create_movie(1)
+        client = APIClient()
+
+        response = client.get(f"/api/movies/{movie.pk}/")
+        self.assertIn("Last-Modified", response)
+        with self.assertNumQueries(0):
+            response = client.get(
+                f"/api/movies/{movie.pk}/", HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_write_changes_the_etag(self):
+        create_movie(1)
+        client = APIClient()
+
+        etag = client.get("/api/movies/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            create_movie(2)
+        response = client.get("/api/movies/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_date_relative_results_are_revalidated_the_next_day(self):
+        create_movie(1, release_date=date.today() + timedelta(days=2))
+        client = APIClient()
+
+        response = client.get("/api/movies/", {"upcoming": "true"})
+        self.assertEqual(len(response.data["results"]), 1)
+        later = date.today() + timedelta(days=3)
+        with mock.patch("movies_and_series.caching.date") as caching_date, mock.patch(
+            "movies_and_series.views.date"
+        ) as views_date:
+            caching_date.today.return_value = later
+            views_date.today.return_value = later
+            response = client.get(
+                "/api/movies/",
+                {"upcoming": "true"},
+                HTTP_IF_NONE_MATCH=response["ETag"],
+                HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"], [])
+
+    @override_settings(CATALOG_CACHE_ALIAS="default")
+    def test_process_local_cache_validates_from_the_database(self):
+        movie = create_movie(1)
+        client = APIClient()
+
+        response = client.get(f"/api/movies/{movie.pk}/")
+        self.assertIn("Last-Modified", response)
+        with self.assertNumQueries(1):
+            response = client.get(
+                f"/api/movies/{movie.pk}/", HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(response.status_code, 304)
+
+        etag = client.get("/api/movies/")["ETag"]
+        with self.assertNumQueries(1):
+            response = client.get("/api/movies/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Movie.objects.filter(pk=movie.pk).update(
+            modified_at=timezone.now() + timedelta(seconds=1)
+        )
+        response = client.get("/api/movies/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class ValuesRowSerializerTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        create_movie(
+            1,
+            title="Amélie",
+            imdb_id=None,
+            tmdb_rating=None,
+            download_urls={"1080p": "https://example.com/1"},
+            casts=[{"name": "Audrey", "character": "Amélie", "profile_path": ""}],
+        )
+        create_movie(2, imdb_rating=8, tmdb_rating=7.25, premium_user=True)
+        create_movie(3, director={"name": "Someone", "profile_path": ""})
+
+    def assertSameJSON(self, serializer_class, fields=None):
+        queryset = Movie.objects.order_by("id")
+        expected = serializer_class(
+            queryset, many=True, context={"fields": fields}
+        ).data
+        row_serializer = ValuesRowSerializer(serializer_class, fields=fields)
+        actual = row_serializer.serialize(queryset.values(*row_serializer.columns))
+        self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+
+    def test_matches_movie_serializer_byte_for_byte(self):
+        self.assertSameJSON(MovieSerializer)
+
+    def test_matches_list_serializer_byte_for_byte(self):
+        self.assertSameJSON(MovieListSerializer)
+
+    def test_matches_sparse_fieldset_byte_for_byte(self):
+        self.assertSameJSON(MovieSerializer, fields=["title", "release_date"])
+
+
+class ExportMoviesTests(CatalogTestCase):
+    def test_export_streams_one_json_object_per_line(self):
+        for tmdb_id in range(1, 4):
+            create_movie(tmdb_id, genres=["Drama" if tmdb_id == 2 else "Action"])
+
+        response = APIClient().get("/api/movies/export.ndjson", {"genres": "Action"})
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        expected = MovieSerializer(
+            Movie.objects.filter(tmdb_id__in=[1, 3]).order_by("id"), many=True
+        ).data
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            json.loads(JSONRenderer().render(expected)),
+        )
+
+    def test_export_since_only_includes_recently_modified_movies(self):
+        create_movie(1)
+        since = timezone.now()
+        create_movie(2)
+
+        response = APIClient().get(
+            "/api/movies/export.ndjson", {"since": since.isoformat()}
+        )
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["tmdb_id"] for line in lines], [2])
+
+    @override_settings(MOVIE_EXPORT_BUFFER_BYTES=1)
+    def test_export_sends_the_first_line_before_reading_the_rest(self):
+        for tmdb_id in range(1, 4):
+            create_movie(tmdb_id)
+
+        response = APIClient().get("/api/movies/export.ndjson")
+        chunks = iter(response.streaming_content)
+        self.assertEqual(json.loads(next(chunks))["tmdb_id"], 1)
+        self.assertEqual([json.loads(chunk)["tmdb_id"] for chunk in chunks], [2, 3])
+
+
+class MovieBatchLookupTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        for tmdb_id in (10, 20, 30):
+            create_movie(tmdb_id)
+
+    def test_batch_returns_movies_keyed_by_tmdb_id(self):
+        with self.assertNumQueries(1):
+            response = APIClient().post(
+                "/api/movies/batch/", {"tmdb_ids": [10, 30, 99]}, format="json"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(set(data["results"]), {"10", "30"})
+        self.assertEqual(data["results"]["30"]["title"], "Movie 30")
+        self.assertEqual(data["missing"], [99])
+
+    @override_settings(MOVIE_BATCH_MAX_SIZE=2)
+    def test_tmdb_id_in_filter_is_capped(self):
+        client = APIClient()
+        response = client.get("/api/movies/", {"tmdb_id__in": "10,20"})
+        self.assertEqual(
+            sorted(movie["tmdb_id"] for movie in response.data["results"]), [10, 20]
+        )
+        response = client.get("/api/movies/", {"tmdb_id__in": "10,20,30"})
+        self.assertEqual(response.status_code, 400)
+
+
+class MovieSuggestTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        create_movie(1, title="The Dark Knight", tmdb_rating=8.5)
+        create_movie(2, title="Dark City", tmdb_rating=7.6)
+        create_movie(3, title="Amélie", tmdb_rating=7.9)
+
+    def suggest(self, q, **params):
+        response = APIClient().get("/api/movies/suggest/", {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [movie["tmdb_id"] for movie in response.data["results"]]
+
+    def test_matches_word_prefixes_ranked_by_rating(self):
+        self.assertEqual(self.suggest("dar"), [2, 1])
+        self.assertEqual(self.suggest("dark k"), [1])
+        self.assertEqual(self.suggest("ame"), [3])
+        self.assertEqual(self.suggest("dar", limit=1), [2])
+        self.assertEqual(self.suggest(""), [])
+
+    def test_suggestions_are_served_without_queries(self):
+        self.suggest("dar")
+        with self.assertNumQueries(0):
+            self.suggest("dar")
+
+    def test_index_follows_catalog_changes(self):
+        self.suggest("dar")
+        with self.captureOnCommitCallbacks(execute=True):
+            create_movie(4, title="Darkest Hour", tmdb_rating=6.0)
+            Movie.objects.get(tmdb_id=2).delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.suggest("dar"), [4, 1])
+
+    def test_writes_of_other_processes_are_applied_as_deltas(self):
+        self.suggest("dar")
+        # Another process writes without signals reaching this one.
+        Movie.objects.bulk_create([unsaved_movie(4, title="Darkman")])
+        Movie.objects.filter(tmdb_id=2).delete()
+        bump_catalog_version()
+
+        # One query for the changed movies, one for the tombstones.
+        with self.assertNumQueries(2):
+            self.assertEqual(sorted(self.suggest("dar")), [1, 4])
+
+        Movie.objects.bulk_create([unsaved_movie(5, title="Dark Water")])
+        with self.assertNumQueries(0):
+            self.assertEqual(sorted(self.suggest("dar")), [1, 4])
+        with override_settings(CATALOG_INDEX_POLL_SECONDS=0):
+            self.assertEqual(sorted(self.suggest("dar")), [1, 4, 5])
+
+    @override_settings(CATALOG_CACHE_ALIAS="default")
+    def test_process_local_cache_still_polls(self):
+        self.suggest("dar")
+        Movie.objects.bulk_create([unsaved_movie(4, title="Darkman")])
+        with self.assertNumQueries(0):
+            self.assertEqual(sorted(self.suggest("dar")), [1, 2])
+        with override_settings(CATALOG_INDEX_POLL_SECONDS=0):
+            self.assertEqual(sorted(self.suggest("dar")), [1, 2, 4])
+
+
+class SimilarMoviesTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        nolan = {"name": "Christopher Nolan"}
+        create_movie(1, genres=["Action", "Crime"], director=nolan)
+        create_movie(2, genres=["Action", "Crime"], director=nolan)
+        create_movie(3, genres=["Action"])
+        create_movie(4, genres=["Romance"], languages=["French"], tmdb_rating=None)
+
+    def similar(self, tmdb_id, **params):
+        return APIClient().get(f"/api/movies/{tmdb_id}/similar/", params)
+
+    def test_ranks_movies_by_shared_features(self):
+        response = self.similar(1)
+        self.assertEqual(response.status_code, 200)
+        results = response.data["results"]
+        self.assertEqual([movie["tmdb_id"] for movie in results[:2]], [2, 3])
+        self.assertGreater(results[0]["similarity"], results[1]["similarity"])
+        self.assertNotIn(1, [movie["tmdb_id"] for movie in results])
+        self.assertEqual(len(self.similar(1, limit=1).data["results"]), 1)
+
+    def test_unknown_movie(self):
+        self.assertEqual(self.similar(99).status_code, 404)
+
+    def test_index_follows_catalog_changes(self):
+        self.similar(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Movie.objects.get(tmdb_id=1).delete()
+            create_movie(5, genres=["Action"])
+        results = self.similar(3).data["results"]
+        self.assertEqual(results[0]["tmdb_id"], 5)
+        self.assertNotIn(1, [movie["tmdb_id"] for movie in results])
+
+
+class MovieFacetsTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        create_movie(1, genres=["Action", "Drama"], premium_user=True)
+        create_movie(2, genres=["Action"], languages=["French"], standard_user=True)
+        create_movie(3, genres=["Comedy"], premium_user=True)
+        self.client = client_for("premium")
+
+    def facets(self, **params):
+        response = self.client.get("/api/movies/facets/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_unfiltered_facets(self):
+        data = self.facets()
+        self.assertEqual(data["count"], 3)
+        self.assertEqual(
+            data["genres"],
+            [
+                {"name": "Action", "count": 2},
+                {"name": "Comedy", "count": 1},
+                {"name": "Drama", "count": 1},
+            ],
+        )
+        self.assertEqual(
+            data["languages"],
+            [{"name": "English", "count": 2}, {"name": "French", "count": 1}],
+        )
+        self.assertEqual(data["tiers"], {"standard": 1, "premium": 2})
+
+    def test_counters_follow_catalog_changes(self):
+        self.facets()
+        with self.captureOnCommitCallbacks(execute=True):
+            Movie.objects.get(tmdb_id=3).delete()
+            movie = Movie.objects.get(tmdb_id=2)
+            movie.genres = ["Drama"]
+            movie.save()
+        # The counters were updated in place, so no query is needed.
+        with self.assertNumQueries(0):
+            data = self.facets()
+        self.assertEqual(
+            data["genres"],
+            [{"name": "Drama", "count": 2}, {"name": "Action", "count": 1}],
+        )
+        self.assertEqual(data["tiers"], {"standard": 1, "premium": 1})
+
+    def test_filtered_facets(self):
+        data = self.facets(genres="action")
+        self.assertEqual(data["count"], 2)
+        self.assertEqual(
+            data["genres"],
+            [{"name": "Action", "count": 2}, {"name": "Drama", "count": 1}],
+        )
+        self.assertEqual(
+            data["production_countries"],
+            [{"name": "United States of America", "count": 2}],
+        )
+        self.assertEqual(data["tiers"], {"standard": 1, "premium": 1})
+
+
+class MovieCollectionTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        today = date.today()
+        create_movie(1, release_date=today - timedelta(days=30), tmdb_rating=6.0)
+        create_movie(2, release_date=today - timedelta(days=1), tmdb_rating=8.0)
+        create_movie(3, release_date=today + timedelta(days=7), tmdb_rating=None)
+        create_movie(4, release_date=today + timedelta(days=2), tmdb_rating=7.0)
+
+    def collection(self, name):
+        response = APIClient().get(f"/api/movies/{name}/")
+        self.assertEqual(response.status_code, 200)
+        return [movie["tmdb_id"] for movie in response.json()["results"]]
+
+    def test_collections(self):
+        self.assertEqual(self.collection("top-rated"), [2, 4, 1])
+        self.assertEqual(self.collection("newest"), [2, 1])
+        self.assertEqual(self.collection("upcoming"), [4, 3])
+
+    def test_collections_are_refreshed_on_write(self):
+        self.collection("top-rated")
+        with self.assertNumQueries(0):
+            self.collection("top-rated")
+        with self.captureOnCommitCallbacks(execute=True):
+            create_movie(5, tmdb_rating=9.0)
+        self.assertEqual(self.collection("top-rated")[0], 5)
+
+
+@override_settings(MOVIE_CHANGES_LAG_SECONDS=0)
+class MovieChangesTests(CatalogTestCase):
+    def changes(self, **params):
+        response = APIClient().get("/api/movies/changes/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_sync_returns_only_changes_since_cursor(self):
+        create_movie(1)
+        create_movie(2)
+        data = self.changes()
+        self.assertEqual([movie["tmdb_id"] for movie in data["movies"]], [1, 2])
+        self.assertEqual(data["deleted"], [])
+
+        movie = Movie.objects.get(tmdb_id=2)
+        movie.title = "Renamed"
+        movie.save()
+        Movie.objects.get(tmdb_id=1).delete()
+        create_movie(3)
+
+        data = self.changes(since=data["cursor"])
+        self.assertEqual([movie["tmdb_id"] for movie in data["movies"]], [2, 3])
+        self.assertEqual(data["movies"][0]["title"], "Renamed")
+        self.assertEqual(data["deleted"], [1])
+
+        data = self.changes(since=data["cursor"])
+        self.assertEqual((data["movies"], data["deleted"]), ([], []))
+
+    @override_settings(MOVIE_CHANGES_PAGE_SIZE=2)
+    def test_sync_is_paged(self):
+        for tmdb_id in range(1, 6):
+            create_movie(tmdb_id)
+        synced = []
+        data = {"cursor": None, "has_more": True}
+        while data["has_more"]:
+            params = {"since": data["cursor"]} if data["cursor"] else {}
+            data = self.changes(**params)
+            synced.extend(movie["tmdb_id"] for movie in data["movies"])
+        self.assertEqual(synced, [1, 2, 3, 4, 5])
+
+    def test_invalid_and_expired_cursors(self):
+        client = APIClient()
+        response = client.get("/api/movies/changes/", {"since": "nope"})
+        self.assertEqual(response.status_code, 400)
+        expired = encode_cursor(timezone.now() - timedelta(days=365))
+        response = client.get("/api/movies/changes/", {"since": expired})
+        self.assertEqual(response.status_code, 410)
+
+
+@override_settings(MOVIE_CHANGES_LAG_SECONDS=0)
+class MovieTierVisibilityTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        create_movie(1, title="Free", download_urls={"720p": "https://e.com/1"})
+        create_movie(2, title="Standard", standard_user=True, premium_user=True)
+        create_movie(3, title="Premium", premium_user=True)
+
+    def listed(self, client):
+        response = client.get("/api/movies/", {"fields": "tmdb_id"})
+        return sorted(movie["tmdb_id"] for movie in response.data["results"])
+
+    def test_min_tier_is_derived_from_the_flags(self):
+        self.assertEqual(
+            dict(Movie.objects.values_list("tmdb_id", "min_tier")),
+            {1: Movie.BASIC, 2: Movie.STANDARD, 3: Movie.PREMIUM},
+        )
+
+    def test_tier_filters_match_the_partial_index_predicates(self):
+        basic = str(Movie.objects.visible_to(AnonymousUser()).query)
+        self.assertIn('"min_tier" = 0', basic)
+        standard = CustomUser(user_type="standard")
+        self.assertIn('"min_tier" <= 1', str(Movie.objects.visible_to(standard).query))
+
+    def test_each_tier_only_sees_its_movies(self):
+        self.assertEqual(self.listed(APIClient()), [1])
+        self.assertEqual(self.listed(client_for("basic")), [1])
+        self.assertEqual(self.listed(client_for("standard")), [1, 2])
+        self.assertEqual(self.listed(client_for("premium")), [1, 2, 3])
+        self.assertEqual(self.listed(client_for("admin")), [1, 2, 3])
+
+    def test_hidden_movies_are_not_served_anywhere(self):
+        client = client_for("standard")
+        self.assertEqual(
+            client.get(f"/api/movies/{Movie.objects.get(tmdb_id=3).pk}/").status_code,
+            404,
+        )
+        response = client.post(
+            "/api/movies/batch/", {"tmdb_ids": [1, 3]}, format="json"
+        )
+        self.assertEqual(response.json()["missing"], [3])
+        self.assertEqual(
+            client.get("/api/movies/suggest/", {"q": "premium"}).data["results"], []
+        )
+        self.assertEqual(client.get("/api/movies/3/similar/").status_code, 404)
+        self.assertEqual(client.get("/api/movies/facets/").json()["count"], 2)
+        exported = client.get("/api/movies/export.ndjson")
+        self.assertEqual(
+            [
+                json.loads(line)["tmdb_id"]
+                for line in b"".join(exported.streaming_content).splitlines()
+            ],
+            [1, 2],
+        )
+
+    def test_changes_report_movies_leaving_the_tier_as_deleted(self):
+        client = client_for("standard")
+        cursor = client.get("/api/movies/changes/").data["cursor"]
+        movie = Movie.objects.get(tmdb_id=2)
+        movie.standard_user = False
+        movie.save(update_fields=["standard_user"])
+        data = client.get("/api/movies/changes/", {"since": cursor}).data
+        self.assertEqual((data["movies"], data["deleted"]), ([], [2]))
@@ -0,0 +1,290 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from requests.adapters import HTTPAdapter
+
+from cinecraze_server.cache import TTLCache
+
+TMDB_IMAGE_URL = "https://image.tmdb.org/t/p/{size}{path}"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Returns the process-wide TMDB session. Connections are kept alive in a
+    pool so consecutive fetches skip the TCP/TLS handshake.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=settings.TMDB_POOL_SIZE
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def fetch_movie_payload(tmdb_id):
+    """
+    Fetches the raw TMDB movie details with credits and videos appended, in a
+    single request. Returns the decoded JSON, or None if the fetch failed.
+    """
+    try:
+        response = get_session().get(
+            f"{settings.TMDB_API_BASE_URL}/movie/{tmdb_id}",
+            params={
+                "api_key": settings.TMDB_API_KEY,
+                "append_to_response": "credits,videos",
+            },
+            timeout=settings.TMDB_TIMEOUT,
+        )
+    except requests.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+    return response.json()
+
+
+def _image_url(size, path):
+    return TMDB_IMAGE_URL.format(size=size, path=path) if path else ""
+
+
+def parse_movie_payload(tmdb_data):
+    """
+    Converts a TMDB movie payload (with appended credits and videos) into the
+    field values stored on a Movie.
+    """
+    credits_data = tmdb_data.get("credits") or {}
+    videos_data = tmdb_data.get("videos") or {}
+
+    trailer_url = ""
+    for video in videos_data.get("results", []):
+        if video["site"] == "YouTube" and video["type"] == "Trailer":
+            trailer_url = f"https://www.youtube.com/watch?v={video['key']}"
+            break
+
+    # Get cast and director
+    casts = [
+        {
+            "name": cast["name"],
+            "character": cast["character"],
+            "profile_path": _image_url("w200", cast.get("profile_path")),
+        }
+        for cast in credits_data.get("cast", [])[:5]
+    ]
+    directors = [
+        {
+            "name": crew["name"],
+            "profile_path": _image_url("w200", crew.get("profile_path")),
+        }
+        for crew in credits_data.get("crew", [])
+        if crew["job"] == "Director"
+    ]
+
+    return {
+        "title": tmdb_data.get("title"),
+        "overview": tmdb_data.get("overview"),
+        "release_date": tmdb_data.get("release_date"),
+        "poster_url": _image_url("w500", tmdb_data.get("poster_path")),
+        "backdrop_url": _image_url("original", tmdb_data.get("backdrop_path")),
+        "trailer_url": trailer_url,
+        "imdb_id": tmdb_data.get("imdb_id"),
+        "imdb_rating": tmdb_data.get("vote_average"),
+        "tmdb_rating": tmdb_data.get("vote_average"),
+        "genres": [genre["name"] for genre in tmdb_data.get("genres", [])],
+        "languages": [
+            language["name"] for language in tmdb_data.get("spoken_languages", [])
+        ],
+        "production_countries": [
+            country["name"] for country in tmdb_data.get("production_countries", [])
+        ],
+        "casts": casts,
+        "director": directors[0] if directors else {},
+    }
+
+
+class TMDBCache:
+    """
+    Two-tier cache of parsed TMDB movie data keyed by tmdb_id. The first tier
+    is an in-process LRU; the optional second tier is a Django cache backend
+    (file or database) shared by every worker.
+    """
+
+    key_prefix = "tmdb:movie:"
+
+    def __init__(self, maxsize, ttl, alias=None):
+        self.ttl = ttl
+        self.alias = alias
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.shared_hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        return caches[self.alias] if self.alias else None
+
+    def get(self, tmdb_id):
+        movie_data = self.local.get(tmdb_id)
+        if movie_data is not None:
+            return movie_data
+        if self.shared is not None:
+            movie_data = self.shared.get(f"{self.key_prefix}{tmdb_id}")
+            if movie_data is not None:
+                self.shared_hits += 1
+                self.local.set(tmdb_id, movie_data)
+                return movie_data
+        self.misses += 1
+        return None
+
+    def set(self, tmdb_id, movie_data):
+        self.local.set(tmdb_id, movie_data)
+        if self.shared is not None:
+            self.shared.set(f"{self.key_prefix}{tmdb_id}", movie_data, self.ttl)
+
+    def invalidate(self, tmdb_id):
+        self.local.delete(tmdb_id)
+        if self.shared is not None:
+            self.shared.delete(f"{self.key_prefix}{tmdb_id}")
+
+    def clear(self):
+        self.local.clear()
+        self.shared_hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {
+            "local_hits": self.local.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "local_size": len(self.local),
+        }
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls sharing a key: the first caller runs the
+    function and every caller that arrives while it is running waits for,
+    and receives, the same result.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+tmdb_cache = TMDBCache(
+    maxsize=settings.TMDB_CACHE_MAX_ENTRIES,
+    ttl=settings.TMDB_CACHE_TTL,
+    alias=settings.TMDB_CACHE_ALIAS,
+)
+tmdb_fetches = SingleFlight()
+
+
+def _fetch_and_cache(tmdb_id):
+    tmdb_data = fetch_movie_payload(tmdb_id)
+    if tmdb_data is None:
+        return None
+    movie_data = parse_movie_payload(tmdb_data)
+    tmdb_cache.set(tmdb_id, movie_data)
+    return movie_data
+
+
+def fetch_movie_data_from_tmdb(tmdb_id, refresh=False):
+    """
+    Fetches the movie data for the given tmdb_id, serving it from the cache
+    when possible. Pass refresh=True to drop any cached copy and fetch the
+    latest data from the TMDB API. Concurrent fetches of the same tmdb_id
+    share a single upstream request.
+    Returns a dictionary containing the movie data, or None if the fetch failed.
+    """
+    if refresh:
+        tmdb_cache.invalidate(tmdb_id)
+    else:
+        movie_data = tmdb_cache.get(tmdb_id)
+        if movie_data is not None:
+            return movie_data
+    return tmdb_fetches.do(tmdb_id, _fetch_and_cache, tmdb_id)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing `rate` acquisitions per second on
+    average, with bursts of up to `capacity`.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a token is available, then consumes it.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated_at) * self.rate
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def fetch_many_from_tmdb(tmdb_ids, max_workers=None, limiter=None, refresh=False):
+    """
+    Fetches movie data for several tmdb_ids in parallel, never running more
+    than max_workers (TMDB_MAX_CONCURRENCY by default) requests at once. When
+    a TokenBucket limiter is given, every fetch waits for a token first.
+    Returns a dictionary mapping each tmdb_id to its movie data, or to None
+    if the fetch failed.
+    """
+    tmdb_ids = list(dict.fromkeys(tmdb_ids))
+    if not tmdb_ids:
+        return {}
+
+    def fetch(tmdb_id):
+        if limiter is not None:
+            limiter.acquire()
+        return fetch_movie_data_from_tmdb(tmdb_id, refresh=refresh)
+
+    max_workers = min(max_workers or settings.TMDB_MAX_CONCURRENCY, len(tmdb_ids))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(tmdb_ids, executor.map(fetch, tmdb_ids)))
@@ -1,14 +1,26 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from cine_request.views import CineRequestViewSet, MarkAsSolvedView
+from cine_request.views import (
+    CineDemandViewSet,
+    CineRequestViewSet,
+    MarkAsSolvedView,
+)
 
-from .views import MovieViewSet, add_movie, delete_movie, update_movie
+from .views import (
+    MovieViewSet,
+    add_movie,
+    bulk_add_movies,
+    delete_movie,
+    export_movies,
+    update_movie,
+)
 
 router = DefaultRouter()
 router.register(r"movies", MovieViewSet)
 # router.register(r"shows", ShowsViewSet)
 router.register(r"cine-request", CineRequestViewSet)
+router.register(r"cine-demand", CineDemandViewSet)
 
 
 urlpatterns = [
@@ -18,6 +30,8 @@ urlpatterns = [
         name="mark_as_solved",
     ),
     path("movies/add/", add_movie, name="add_movie"),
+    path("movies/bulk-add/", bulk_add_movies, name="bulk_add_movies"),
+    path("movies/export.ndjson", export_movies, name="export_movies"),
     path("movies/update/<int:tmdb_id>/", update_movie, name="update_movie"),
     path("movies/delete/<int:tmdb_id>/", delete_movie, name="delete_movie"),
     path("", include(router.urls)),
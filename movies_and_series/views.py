@@ -1,132 +1,50 @@
-import environ
-
-env = environ.Env()
-environ.Env.read_env()
+import json
 from datetime import date, timedelta
 
-import requests
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django_filters.rest_framework import (
     BaseInFilter,
     BooleanFilter,
     CharFilter,
     DjangoFilterBackend,
     FilterSet,
+    NumberFilter,
 )
-from rest_framework import filters, status, viewsets
-from rest_framework.decorators import api_view
-from rest_framework.filters import SearchFilter
+from rest_framework import status, viewsets
+from rest_framework.decorators import action, api_view
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
+from .caching import CatalogConditionalGetMixin, CatalogResponseCacheMixin
+from .changes import catalog_changes, decode_cursor, encode_cursor, tombstone_horizon
+from .facets import count_facets, facet_index
+from .ingest import ingest_movies
+from .lookups import filter_by_tags
 from .models import Movie
-from .serializers import MovieSerializer
-
-TMDB_API_KEY = env.str("TMDB_API_KEY")
-TMDB_MOVIE_API_URL = "https://api.themoviedb.org/3/movie/{}"
-TMDB_MOVIE_CREDITS_URL = "https://api.themoviedb.org/3/movie/{}/credits"
-TMDB_MOVIE_VIDEOS_URL = "https://api.themoviedb.org/3/movie/{}/videos"
-
+from .search import FullTextSearchFilter
+from .serializers import (
+    MovieBatchSerializer,
+    MovieIngestSerializer,
+    MovieListSerializer,
+    MovieSerializer,
+    ValuesRowSerializer,
+)
+from .similar import similarity_index
+from .suggest import title_index
+from .tmdb import fetch_movie_data_from_tmdb
 
-def fetch_movie_data_from_tmdb(tmdb_id):
-    """
-    Fetches the latest movie data from the TMDB API for the given tmdb_id.
-    Returns a dictionary containing the movie data, or None if the fetch failed.
-    """
-    response = requests.get(
-        TMDB_MOVIE_API_URL.format(tmdb_id), params={"api_key": TMDB_API_KEY}
-    )
-    credits_response = requests.get(
-        TMDB_MOVIE_CREDITS_URL.format(tmdb_id), params={"api_key": TMDB_API_KEY}
-    )
-    videos_response = requests.get(
-        TMDB_MOVIE_VIDEOS_URL.format(tmdb_id), params={"api_key": TMDB_API_KEY}
-    )
 
-    if (
-        response.status_code == 200
-        and credits_response.status_code == 200
-        and videos_response.status_code == 200
-    ):
-        tmdb_data = response.json()
-        credits_data = credits_response.json()
-        videos_data = videos_response.json()
-
-        title = tmdb_data.get("title")
-        overview = tmdb_data.get("overview")
-        release_date = tmdb_data.get("release_date")
-        poster_path = tmdb_data.get("poster_path")
-        poster_url = (
-            f"https://image.tmdb.org/t/p/w500{poster_path}" if poster_path else ""
-        )
-        backdrop_path = tmdb_data.get("backdrop_path")
-        backdrop_url = (
-            f"https://image.tmdb.org/t/p/original{backdrop_path}"
-            if backdrop_path
-            else ""
-        )
-        imdb_id = tmdb_data.get("imdb_id")
-        imdb_rating = tmdb_data.get("vote_average")
-        tmdb_rating = tmdb_data.get("vote_average")
-        genres = [genre["name"] for genre in tmdb_data.get("genres", [])]
-        languages = [
-            language["name"] for language in tmdb_data.get("spoken_languages", [])
-        ]
-        production_countries = [
-            country["name"] for country in tmdb_data.get("production_countries", [])
-        ]
-        trailer_url = ""
-        for video in videos_data.get("results", []):
-            if video["site"] == "YouTube" and video["type"] == "Trailer":
-                trailer_url = f"https://www.youtube.com/watch?v={video['key']}"
-                break
-
-        # Get cast and director
-        casts = [
-            {
-                "name": cast["name"],
-                "character": cast["character"],
-                "profile_path": (
-                    f'https://image.tmdb.org/t/p/w200{cast["profile_path"]}'
-                    if cast.get("profile_path")
-                    else ""
-                ),
-            }
-            for cast in credits_data.get("cast", [])[:5]
-        ]
-        directors = [
-            {
-                "name": crew["name"],
-                "profile_path": (
-                    f'https://image.tmdb.org/t/p/w200{crew["profile_path"]}'
-                    if crew.get("profile_path")
-                    else ""
-                ),
-            }
-            for crew in credits_data.get("crew", [])
-            if crew["job"] == "Director"
-        ]
-        director = directors[0] if directors else {}
-
-        return {
-            "title": title,
-            "overview": overview,
-            "release_date": release_date,
-            "poster_url": poster_url,
-            "backdrop_url": backdrop_url,
-            "trailer_url": trailer_url,
-            "imdb_id": imdb_id,
-            "imdb_rating": imdb_rating,
-            "tmdb_rating": tmdb_rating,
-            "genres": genres,
-            "languages": languages,
-            "production_countries": production_countries,
-            "casts": casts,
-            "director": director,
-        }
-    return None
+class CharArrayFilter(BaseInFilter, CharFilter):
+    pass
 
 
-class CharArrayFilter(BaseInFilter, CharFilter):
+class NumberArrayFilter(BaseInFilter, NumberFilter):
     pass
 
 
@@ -136,6 +54,7 @@ class MovieFilter(FilterSet):
     new_release = BooleanFilter(field_name="new_release", method="filter_new_release")
     upcoming = BooleanFilter(field_name="upcoming", method="filter_upcoming")
     tmdb_id = CharFilter(field_name="tmdb_id", lookup_expr="exact")
+    tmdb_id__in = NumberArrayFilter(field_name="tmdb_id", method="filter_tmdb_id_in")
     imdb_id = CharFilter(field_name="imdb_id", lookup_expr="exact")
     production_countries = CharFilter(
         field_name="production_countries", method="filter_production_countries"
@@ -153,11 +72,20 @@ class MovieFilter(FilterSet):
             "production_countries",
         ]
 
+    def filter_tmdb_id_in(self, queryset, name, value):
+        if len(value) > settings.MOVIE_BATCH_MAX_SIZE:
+            raise ValidationError(
+                {
+                    "tmdb_id__in": f"At most {settings.MOVIE_BATCH_MAX_SIZE} tmdb ids can be requested at once."
+                }
+            )
+        return queryset.filter(tmdb_id__in=value)
+
     def filter_languages(self, queryset, name, value):
-        return queryset.filter(languages__icontains=value)
+        return filter_by_tags(queryset, "languages", value)
 
     def filter_genres(self, queryset, name, value):
-        return queryset.filter(genres__icontains=value)
+        return filter_by_tags(queryset, "genres", value)
 
     def filter_new_release(self, queryset, name, value):
         if value:
@@ -172,31 +100,326 @@ class MovieFilter(FilterSet):
         return queryset
 
     def filter_production_countries(self, queryset, name, value):
-        return queryset.filter(production_countries__icontains=value)
+        return filter_by_tags(queryset, "production_countries", value)
 
 
-class MovieViewSet(viewsets.ModelViewSet):
+class MovieOrderingFilter(OrderingFilter):
+    """
+    ?ordering= restricted to the view's ordering_fields, which must be
+    indexed. Only the first column is used, with ties broken on id in the
+    same direction to match the (column, id) indexes, and movies without a value for the ordering column
+    are left out, as cursor pagination cannot page over NULLs.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering and ordering[0].lstrip("-") != "id":
+            direction = "-" if ordering[0].startswith("-") else ""
+            ordering = (ordering[0], f"{direction}id")
+        return ordering
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        if ordering:
+            field = Movie._meta.get_field(ordering[0].lstrip("-"))
+            if field.null:
+                queryset = queryset.filter(**{f"{field.name}__isnull": False})
+            queryset = queryset.order_by(*ordering)
+        return queryset
+
+
+def get_limit(request, default, maximum):
+    """
+    Reads the ?limit= parameter, falling back to `default` and capped at
+    `maximum`.
+    """
+    try:
+        limit = int(request.query_params.get("limit", default))
+    except ValueError:
+        limit = default
+    return min(limit, maximum)
+
+
+class ValuesListMixin:
+    """
+    Serves the list action from queryset.values() through ValuesRowSerializer
+    instead of building model instances and a serializer per row.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        row_serializer = ValuesRowSerializer(
+            self.get_serializer_class(),
+            fields=self.get_serializer_context().get("fields"),
+        )
+        # The pagination cursor is read from the first ordering column.
+        ordering = ()
+        if self.paginator is not None:
+            ordering = self.paginator.get_ordering(request, queryset, self)
+        rows = queryset.values(
+            *row_serializer.columns, *(name.lstrip("-") for name in ordering)
+        )
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.serialize(page))
+        return Response(row_serializer.serialize(rows))
+
+
+class MovieViewSet(
+    CatalogConditionalGetMixin,
+    CatalogResponseCacheMixin,
+    ValuesListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Movie.objects.all()
     serializer_class = MovieSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    # The search filter runs last so relevance ordering wins when searching.
+    filter_backends = [DjangoFilterBackend, MovieOrderingFilter, FullTextSearchFilter]
     filterset_class = MovieFilter
     search_fields = ["title", "overview"]
+    ordering_fields = ["release_date", "tmdb_rating"]
+    ordering = ("-release_date", "-id")
+    # Columns always loaded for reads, as the pagination cursor needs them.
+    cursor_fields = ("id", "release_date", "tmdb_rating")
+    # Actions listing movies, served with MovieListSerializer by default.
+    list_actions = ("list", "batch", "top_rated", "newest", "upcoming")
+
+    def get_requested_fields(self):
+        """
+        Returns the serializer fields selected with ?fields=title,poster_url,
+        or None when the parameter is absent. Unknown names are skipped; a
+        parameter naming no readable field at all is rejected.
+        """
+        fields = self.request.query_params.get("fields")
+        if not fields:
+            return None
+        readable = [
+            name for name in MovieSerializer.Meta.fields if name != "fetch_latest"
+        ]
+        requested = [
+            name.strip() for name in fields.split(",") if name.strip() in readable
+        ]
+        if not requested:
+            raise ValidationError({"fields": f"Choose from: {', '.join(readable)}."})
+        return requested
+
+    def get_serializer_class(self):
+        if self.action in self.list_actions and self.get_requested_fields() is None:
+            return MovieListSerializer
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in (*self.list_actions, "retrieve", "changes"):
+            context["fields"] = self.get_requested_fields()
+        return context
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().visible_to(self.request.user)
+        if self.action in ("list", "retrieve"):
+            fields = self.get_requested_fields()
+            if fields is None:
+                fields = self.get_serializer_class().Meta.fields
+            # Heavy JSON and text columns are only read when serialized.
+            queryset = queryset.only(
+                *self.cursor_fields,
+                *(name for name in fields if name != "fetch_latest"),
+            )
         return queryset
 
+    @action(detail=False, methods=["post"])
+    def batch(self, request):
+        """
+        Looks up many movies by tmdb_id in one indexed query. Takes
+        {"tmdb_ids": [...]} and returns the movies keyed by tmdb_id, plus the
+        ids that were not found.
+        """
+        serializer = MovieBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tmdb_ids = serializer.validated_data["tmdb_ids"]
+
+        row_serializer = ValuesRowSerializer(
+            self.get_serializer_class(),
+            fields=self.get_serializer_context().get("fields"),
+        )
+        rows = (
+            self.get_queryset()
+            .filter(tmdb_id__in=tmdb_ids)
+            .values("tmdb_id", *row_serializer.columns)
+        )
+        results = {
+            row["tmdb_id"]: row_serializer.to_representation(row) for row in rows
+        }
+        return Response(
+            {
+                "results": results,
+                "missing": [tmdb_id for tmdb_id in tmdb_ids if tmdb_id not in results],
+            }
+        )
+
+    def collection(self, request, queryset, *ordering):
+        """
+        Responds with the first MOVIE_COLLECTION_SIZE movies of `queryset` in
+        the given (indexed) ordering. The response is cached until the next
+        catalog write, so the collection is computed once per version.
+        """
+
+        def handler(request):
+            row_serializer = ValuesRowSerializer(
+                self.get_serializer_class(),
+                fields=self.get_serializer_context().get("fields"),
+            )
+            rows = queryset.order_by(*ordering).values(*row_serializer.columns)
+            return Response(
+                {
+                    "results": row_serializer.serialize(
+                        rows[: settings.MOVIE_COLLECTION_SIZE]
+                    )
+                }
+            )
+
+        return self.cached_response(handler, request)
+
+    @action(detail=False, methods=["get"], url_path="top-rated")
+    def top_rated(self, request):
+        queryset = self.get_queryset().filter(tmdb_rating__isnull=False)
+        return self.collection(request, queryset, "-tmdb_rating", "-id")
+
+    @action(detail=False, methods=["get"])
+    def newest(self, request):
+        queryset = self.get_queryset().filter(release_date__lte=date.today())
+        return self.collection(request, queryset, "-release_date", "-id")
+
+    @action(detail=False, methods=["get"])
+    def upcoming(self, request):
+        queryset = self.get_queryset().filter(release_date__gt=date.today())
+        return self.collection(request, queryset, "release_date", "id")
+
+    @action(detail=False, methods=["get"])
+    def changes(self, request):
+        """
+        Delta sync: returns the movies saved and the tmdb ids of the movies
+        deleted since ?since=, the cursor returned by the previous call.
+        Without it, the whole catalog is returned. Keep calling with the new
+        cursor while `has_more` is true.
+        """
+        since = request.query_params.get("since")
+        if since:
+            try:
+                since = decode_cursor(since)
+            except ValueError:
+                return Response(
+                    {"error": "'since' is not a valid cursor."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if since < tombstone_horizon():
+                return Response(
+                    {"error": "The cursor has expired, sync the whole catalog."},
+                    status=status.HTTP_410_GONE,
+                )
+        else:
+            since = None
+
+        row_serializer = ValuesRowSerializer(
+            MovieSerializer, fields=self.get_serializer_context().get("fields")
+        )
+        changes = catalog_changes(
+            Movie.objects.all(),
+            row_serializer.columns,
+            since=since,
+            max_tier=Movie.user_tier(request.user),
+        )
+        return Response(
+            {
+                "movies": row_serializer.serialize(changes["movies"]),
+                "deleted": changes["deleted"],
+                "cursor": encode_cursor(changes["cursor"]),
+                "has_more": changes["has_more"],
+            }
+        )
+
+    @action(detail=False, methods=["get"])
+    def facets(self, request):
+        """
+        Counts the movies per genre, language, production country and tier,
+        for the movies selected by the MovieFilter and search parameters.
+        """
+        return self.cached_response(self.facet_counts, request)
+
+    def facet_counts(self, request):
+        filter_params = [*MovieFilter.base_filters, FullTextSearchFilter.search_param]
+        if not any(request.query_params.get(name) for name in filter_params):
+            facet_index.ensure_current()
+            return Response(facet_index.counts(Movie.user_tier(request.user)))
+        return Response(count_facets(self.filter_queryset(self.get_queryset())))
+
+    @action(detail=False, methods=["get"])
+    def suggest(self, request):
+        """
+        Title autocomplete for ?q=, answered from the in-process title index
+        rather than the database. ?limit= caps the number of suggestions.
+        """
+        limit = get_limit(
+            request, settings.MOVIE_SUGGEST_LIMIT, settings.MOVIE_SUGGEST_MAX_LIMIT
+        )
+
+        title_index.ensure_current()
+        return Response(
+            {
+                "results": title_index.search(
+                    request.query_params.get("q", ""),
+                    limit,
+                    Movie.user_tier(request.user),
+                )
+            }
+        )
+
+    @action(detail=False, methods=["get"], url_path=r"(?P<tmdb_id>\d+)/similar")
+    def similar(self, request, tmdb_id):
+        """
+        Lists the movies most similar to the given one by genres, languages,
+        cast, director and rating, best first, each with its `similarity`.
+        """
+        limit = get_limit(
+            request, settings.MOVIE_SIMILAR_LIMIT, settings.MOVIE_SIMILAR_MAX_LIMIT
+        )
+        similarity_index.ensure_current()
+        matches = similarity_index.similar(
+            int(tmdb_id), limit, Movie.user_tier(request.user)
+        )
+        if matches is None:
+            return Response(
+                {"detail": "No movie matches the given tmdb id."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        scores = dict(matches)
+        row_serializer = ValuesRowSerializer(MovieListSerializer)
+        rows = (
+            self.get_queryset()
+            .filter(tmdb_id__in=scores)
+            .values("tmdb_id", *row_serializer.columns)
+        )
+        results = sorted(
+            (
+                {
+                    **row_serializer.to_representation(row),
+                    "similarity": scores[row["tmdb_id"]],
+                }
+                for row in rows
+            ),
+            key=lambda movie: -movie["similarity"],
+        )
+        return Response({"results": results})
+
 
 @api_view(["POST"])
 def add_movie(request):
     if request.method == "POST":
-        serializer = MovieSerializer(data=request.data)
+        serializer = MovieIngestSerializer(data=request.data)
         if serializer.is_valid():
             tmdb_id = serializer.validated_data["tmdb_id"]
-            download_urls = serializer.validated_data["download_urls"]
-            streaming_urls = serializer.validated_data["streaming_urls"]
-            standard_user = serializer.validated_data["standard_user"]
-            premium_user = serializer.validated_data["premium_user"]
 
             # Fetch movie data from TMDB API
             movie_data = fetch_movie_data_from_tmdb(tmdb_id)
@@ -208,34 +431,120 @@ def add_movie(request):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # Create and save the movie instance
-            movie = Movie(
+            # Create the movie, or update it if the tmdb id was already added,
+            # so duplicate and concurrent submissions are harmless. An update
+            # only sets the fields sent, so re-adding a movie without its
+            # flags and links does not reset them.
+            synced = {**movie_data, "tmdb_synced_at": timezone.now()}
+            movie, created = Movie.objects.update_or_create(
                 tmdb_id=tmdb_id,
-                imdb_id=movie_data["imdb_id"],
-                download_urls=download_urls,
-                streaming_urls=streaming_urls,
-                title=movie_data["title"],
-                overview=movie_data["overview"],
-                languages=movie_data["languages"],
-                casts=movie_data["casts"],
-                imdb_rating=movie_data["imdb_rating"],
-                tmdb_rating=movie_data["tmdb_rating"],
-                director=movie_data["director"],
-                genres=movie_data["genres"],
-                release_date=movie_data["release_date"],
-                poster_url=movie_data["poster_url"],
-                backdrop_url=movie_data["backdrop_url"],
-                trailer_url=movie_data["trailer_url"],
-                production_countries=movie_data["production_countries"],
-                standard_user=standard_user,
-                premium_user=premium_user,
+                defaults={
+                    **{
+                        name: value
+                        for name, value in serializer.validated_data.items()
+                        if name in request.data
+                    },
+                    **synced,
+                },
+                create_defaults={**serializer.validated_data, **synced},
             )
-            movie.save()
 
-            return Response(MovieSerializer(movie).data, status=status.HTTP_201_CREATED)
+            return Response(
+                MovieSerializer(movie).data,
+                status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+            )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(["POST"])
+def bulk_add_movies(request):
+    entries = request.data
+    if not isinstance(entries, list):
+        return Response(
+            {"error": "Expected a list of movies."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if len(entries) > settings.MOVIE_BULK_MAX_ENTRIES:
+        return Response(
+            {
+                "error": f"At most {settings.MOVIE_BULK_MAX_ENTRIES} movies can be added at once."
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    results = ingest_movies(entries)
+    return Response(
+        {
+            "created": sum(result["status"] == "created" for result in results),
+            "updated": sum(result["status"] == "updated" for result in results),
+            "failed": sum(result["status"] == "failed" for result in results),
+            "results": results,
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
+@api_view(["GET"])
+def export_movies(request):
+    """
+    Streams the catalog as newline-delimited JSON, one MovieSerializer object
+    per line. Accepts the MovieFilter parameters and `since`, an ISO 8601
+    datetime, to only export movies modified from then on.
+    """
+    filterset = MovieFilter(
+        request.query_params,
+        queryset=Movie.objects.visible_to(request.user),
+        request=request,
+    )
+    if not filterset.is_valid():
+        return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+    queryset = filterset.qs
+
+    since = request.query_params.get("since")
+    if since:
+        since = parse_datetime(since)
+        if since is None:
+            return Response(
+                {"error": "'since' must be an ISO 8601 datetime."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        queryset = queryset.filter(modified_at__gte=since)
+
+    row_serializer = ValuesRowSerializer(MovieSerializer)
+    rows = (
+        queryset.order_by("id")
+        .values(*row_serializer.columns)
+        .iterator(chunk_size=settings.MOVIE_EXPORT_CHUNK_SIZE)
+    )
+
+    def lines():
+        # The first line goes out as soon as it is serialized; later ones are
+        # sent in writes of about MOVIE_EXPORT_BUFFER_BYTES.
+        buffer = []
+        size = 0
+        flush_at = 0
+        for row in rows:
+            line = json.dumps(
+                row_serializer.to_representation(row),
+                cls=JSONEncoder,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            ).encode()
+            buffer.append(line)
+            size += len(line) + 1
+            if size >= flush_at:
+                yield b"\n".join(buffer) + b"\n"
+                buffer = []
+                size = 0
+                flush_at = settings.MOVIE_EXPORT_BUFFER_BYTES
+        if buffer:
+            yield b"\n".join(buffer) + b"\n"
+
+    return StreamingHttpResponse(lines(), content_type="application/x-ndjson")
+
+
 @api_view(["PATCH"])
 def update_movie(request, tmdb_id):
     # Check if 'fetch_latest' is in request data
@@ -249,7 +558,7 @@ def update_movie(request, tmdb_id):
 
     # Fetch the latest movie data from TMDB API if requested
     if request.data["fetch_latest"]:
-        movie_data = fetch_movie_data_from_tmdb(tmdb_id)
+        movie_data = fetch_movie_data_from_tmdb(tmdb_id, refresh=True)
         if movie_data:
             movie.title = movie_data["title"]
             movie.overview = movie_data["overview"]
@@ -265,6 +574,7 @@ def update_movie(request, tmdb_id):
             movie.production_countries = movie_data["production_countries"]
             movie.casts = movie_data["casts"]
             movie.director = movie_data["director"]
+            movie.tmdb_synced_at = timezone.now()
 
     # Apply partial updates from request data
     serializer = MovieSerializer(movie, data=request.data, partial=True)
@@ -0,0 +1,139 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+def enqueue_email(subject, to, body="", html_body="", template="", context=None):
+    """
+    Adds an email to the outbox. Call it inside the transaction making the
+    change the email is about: the email is only sent if it commits. An
+    HTML `template` is rendered with the JSON `context` when it is sent.
+    """
+    return OutboxEmail.objects.create(
+        subject=subject,
+        to=list(to),
+        body=body,
+        html_body=html_body,
+        template=template,
+        context=context or {},
+    )
+
+
+def enqueue_emails(emails):
+    """
+    Adds several emails to the outbox with one INSERT. Each email is a dict
+    of the arguments taken by enqueue_email.
+    """
+    return OutboxEmail.objects.bulk_create(
+        OutboxEmail(
+            subject=email["subject"],
+            to=list(email["to"]),
+            body=email.get("body", ""),
+            html_body=email.get("html_body", ""),
+            template=email.get("template", ""),
+            context=email.get("context") or {},
+        )
+        for email in emails
+    )
+
+
+def retry_delay(attempts):
+    """
+    Returns how long to wait before retrying an email that failed `attempts`
+    times: OUTBOX_RETRY_BACKOFF seconds, doubled after every failure.
+    """
+    return timedelta(seconds=settings.OUTBOX_RETRY_BACKOFF * 2 ** (attempts - 1))
+
+
+def claim_due_emails(batch_size):
+    """
+    Takes up to `batch_size` due emails for this sender by pushing their
+    next attempt past OUTBOX_LEASE_SECONDS. Concurrent senders skip the rows
+    locked here, and if this sender dies the emails become due again once
+    the lease expires.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxEmail.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        OutboxEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+        )
+    return emails
+
+
+def build_message(email, connection):
+    message = EmailMultiAlternatives(
+        email.subject, email.body, to=email.to, connection=connection
+    )
+    html_body = email.html_body
+    if email.template:
+        html_body = render_to_string(email.template, email.context)
+    if html_body:
+        message.attach_alternative(html_body, "text/html")
+    return message
+
+
+def record_failure(email, error):
+    """
+    Schedules a retry of an email that could not be sent, or marks it failed
+    once it ran out of attempts. Returns the new status.
+    """
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        email.status = OutboxEmail.FAILED
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+    email.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+    return email.status
+
+
+def send_outbox(batch_size=None):
+    """
+    Sends one batch of due emails over a single email backend connection.
+    Failed emails are retried with exponential backoff, up to
+    OUTBOX_MAX_ATTEMPTS attempts. Returns counts of the sent, retried and
+    failed emails.
+    """
+    emails = claim_due_emails(batch_size or settings.OUTBOX_BATCH_SIZE)
+    sent = []
+    failures = []
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        failures = [(email, e) for email in emails]
+    else:
+        try:
+            for email in emails:
+                # Messages go one at a time over the shared connection, so a
+                # rejected recipient only fails its own email.
+                try:
+                    if connection.send_messages([build_message(email, connection)]):
+                        sent.append(email.pk)
+                    else:
+                        failures.append((email, "The email backend sent nothing."))
+                except Exception as e:
+                    failures.append((email, e))
+        finally:
+            connection.close()
+
+    OutboxEmail.objects.filter(pk__in=sent).update(
+        status=OutboxEmail.SENT, sent_at=timezone.now()
+    )
+    statuses = [record_failure(email, error) for email, error in failures]
+    return {
+        "sent": len(sent),
+        "retried": statuses.count(OutboxEmail.PENDING),
+        "failed": statuses.count(OutboxEmail.FAILED),
+    }
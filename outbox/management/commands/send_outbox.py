@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from outbox.mail import send_outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends the due emails of the outbox in batches over one email backend "
+        "connection, retrying failed emails with exponential backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Number of emails sent per connection (OUTBOX_BATCH_SIZE by default).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="Keep running, polling the outbox every this many seconds.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            # Drain every due email before waiting for the next poll.
+            while True:
+                counts = send_outbox(batch_size=options["batch_size"])
+                if any(counts.values()):
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            "Sent {sent} emails, {retried} to retry, "
+                            "{failed} failed.".format(**counts)
+                        )
+                    )
+                if not counts["sent"]:
+                    break
+            if options["interval"] is None:
+                break
+            time.sleep(options["interval"])
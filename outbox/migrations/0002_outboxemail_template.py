@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("outbox", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboxemail",
+            name="context",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="outboxemail",
+            name="template",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
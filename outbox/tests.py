@@ -0,0 +1,60 @@
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .mail import enqueue_email, send_outbox
+from .models import OutboxEmail
+
+
+class FailingEmailBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError("SMTP server unavailable")
+
+
+class SendOutboxTests(TestCase):
+    def test_sends_due_emails_in_one_batch(self):
+        for i in range(3):
+            enqueue_email(f"Hello {i}", [f"user{i}@example.com"], html_body="<p>Hi</p>")
+
+        counts = send_outbox()
+
+        self.assertEqual(counts, {"sent": 3, "retried": 0, "failed": 0})
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].alternatives, [("<p>Hi</p>", "text/html")])
+        self.assertEqual(OutboxEmail.objects.filter(status=OutboxEmail.SENT).count(), 3)
+        self.assertEqual(send_outbox(), {"sent": 0, "retried": 0, "failed": 0})
+
+    def test_templates_are_rendered_by_the_sender(self):
+        enqueue_email(
+            "Fulfilled",
+            ["ann@example.com"],
+            template="cine_request/request_fulfilled.html",
+            context={"cine_request": {"name": "Ann"}},
+        )
+
+        self.assertEqual(send_outbox()["sent"], 1)
+        html_body, mimetype = mail.outbox[0].alternatives[0]
+        self.assertEqual(mimetype, "text/html")
+        self.assertIn("Ann", html_body)
+
+    @override_settings(
+        EMAIL_BACKEND="outbox.tests.FailingEmailBackend",
+        OUTBOX_MAX_ATTEMPTS=2,
+        OUTBOX_RETRY_BACKOFF=60,
+    )
+    def test_failed_emails_are_retried_with_backoff(self):
+        email = enqueue_email("Hello", ["user@example.com"])
+
+        self.assertEqual(send_outbox(), {"sent": 0, "retried": 1, "failed": 0})
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.last_error, "SMTP server unavailable")
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        # Not due again until the backoff has elapsed.
+        self.assertEqual(send_outbox(), {"sent": 0, "retried": 0, "failed": 0})
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(send_outbox(), {"sent": 0, "retried": 0, "failed": 1})
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.FAILED)
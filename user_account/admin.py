@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
+from cinecraze_server.pagination import EstimatedCountPaginator
+
 from .models import CustomUser
 
 
@@ -31,6 +33,8 @@ class CustomUserAdmin(UserAdmin):
     )
     search_fields = ("email", "name")
     ordering = ("email",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 admin.site.register(CustomUser, CustomUserAdmin)
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from cinecraze_server.cache import TTLCache
+
+from .models import CustomUser
+
+# Token key -> (user_id, user_type, is_active). Entries are dropped when the
+# token or its user changes; the TTL bounds how long another worker process
+# may keep serving an entry dropped here.
+token_cache = TTLCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_TOKEN_CACHE_TTL,
+)
+
+CACHED_USER_FIELDS = ("id", "user_type", "is_active")
+
+
+def cache_token(key, user):
+    token_cache.set(key, tuple(getattr(user, name) for name in CACHED_USER_FIELDS))
+
+
+def cached_user(entry):
+    """
+    Builds a user from a cache entry without querying the database. The
+    other fields are deferred and loaded on first access.
+    """
+    values = dict(zip(CACHED_USER_FIELDS, entry))
+    field_names = [
+        field.attname
+        for field in CustomUser._meta.concrete_fields
+        if field.attname in values
+    ]
+    return CustomUser.from_db(
+        "default", field_names, [values[name] for name in field_names]
+    )
+
+
+def invalidate_user_tokens(user_id):
+    for key in Token.objects.filter(user_id=user_id).values_list("key", flat=True):
+        token_cache.delete(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication resolving tokens from an in-process TTL cache, so
+    authenticated requests only query the database on a cache miss.
+    """
+
+    def authenticate_credentials(self, key):
+        entry = token_cache.get(key)
+        if entry is None:
+            user, token = super().authenticate_credentials(key)
+            cache_token(key, user)
+            return user, token
+
+        user = cached_user(entry)
+        if not user.is_active:
+            raise AuthenticationFailed(_("User inactive or deleted."))
+        return user, Token(key=key, user=user)
@@ -1,3 +1,174 @@
-from django.test import TestCase
+import base64
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core import mail
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+
+from cinecraze_server.throttling import reset_throttle_stats, throttle_stats
+from outbox.models import OutboxEmail
+
+from .authentication import CachedTokenAuthentication, token_cache
+from .models import CustomUser
+from .views import UserLoginAPIView
+
+
+class UserRegistrationTests(TestCase):
+    def test_registration_queues_confirmation_email(self):
+        response = APIClient().post(
+            "/user/register/",
+            {"name": "Ann", "email": "ann@example.com", "password": "s3cret-pass"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(CustomUser.objects.get(email="ann@example.com").is_active)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.to, ["ann@example.com"])
+        self.assertIn("/user/activate/", email.html_body)
+        self.assertEqual(len(mail.outbox), 0)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = CustomUser.objects.create_user(
+            name="Ann", email="ann@example.com", password="s3cret-pass"
+        )
+        self.user.is_active = True
+        self.user.save()
+
+    def login(self):
+        response = APIClient().post(
+            "/user/login/", {"email": "ann@example.com", "password": "s3cret-pass"}
+        )
+        return response.data["token"]
+
+    def authenticate(self, key):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Token {key}")
+        return CachedTokenAuthentication().authenticate(request)
+
+    def test_login_primes_the_cache(self):
+        key = self.login()
+        with self.assertNumQueries(0):
+            user, token = self.authenticate(key)
+        self.assertEqual((user.pk, user.user_type), (self.user.pk, "basic"))
+        self.assertTrue(user.is_authenticated)
+        self.assertEqual(token.key, key)
+        self.assertEqual(user.email, "ann@example.com")
+
+    def test_password_change_and_user_updates_invalidate_the_cache(self):
+        key = self.login()
+        response = APIClient().post(
+            "/user/change_password/",
+            {
+                "user_id": self.user.pk,
+                "old_password": "s3cret-pass",
+                "password": "n3w-pass",
+                "password2": "n3w-pass",
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(token_cache.get(key))
+
+        self.authenticate(key)
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.user.refresh_from_db()
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(key)
+
+    def test_deleted_token_is_rejected(self):
+        key = self.login()
+        Token.objects.filter(key=key).delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(key)
+
+
+THROTTLED = {
+    **settings.REST_FRAMEWORK,
+    "DEFAULT_THROTTLE_RATES": {"login": "4/minute", "login_account": "2/minute"},
+}
+
+
+@override_settings(REST_FRAMEWORK=THROTTLED)
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+        reset_throttle_stats()
+
+    def login(self, email):
+        return APIClient().post(
+            "/user/login/", {"email": email, "password": "wrong"}, format="json"
+        )
+
+    def test_budgets_per_account_and_per_ip(self):
+        self.assertEqual(self.login("ann@example.com").status_code, 200)
+        self.assertEqual(self.login("ann@example.com").status_code, 200)
+        response = self.login("ann@example.com")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+        self.assertEqual(self.login("bob@example.com").status_code, 200)
+        self.assertEqual(self.login("eve@example.com").status_code, 429)
+        self.assertEqual(throttle_stats(), {"login_account": 1, "login": 1})
+
+    def test_forwarded_for_header_does_not_reset_the_ip_budget(self):
+        statuses = [
+            APIClient()
+            .post(
+                "/user/login/",
+                {"email": f"user{i}@example.com", "password": "wrong"},
+                format="json",
+                HTTP_X_FORWARDED_FOR=f"10.0.0.{i}",
+            )
+            .status_code
+            for i in range(6)
+        ]
+        self.assertEqual(statuses, [200] * 4 + [429] * 2)
+
+    @override_settings(REST_FRAMEWORK={**THROTTLED, "NUM_PROXIES": 1})
+    def test_trusted_proxy_hop_identifies_the_client(self):
+        for i in range(6):
+            response = APIClient().post(
+                "/user/login/",
+                {"email": f"user{i}@example.com", "password": "wrong"},
+                format="json",
+                HTTP_X_FORWARDED_FOR=f"198.51.100.7, 10.0.0.{i}",
+            )
+            self.assertEqual(response.status_code, 200)
+
+    def test_basic_auth_header_is_throttled_without_hashing(self):
+        credentials = base64.b64encode(b"ann@example.com:wrong").decode()
+        with mock.patch(
+            "django.contrib.auth.hashers.PBKDF2PasswordHasher.encode"
+        ) as encode:
+            statuses = [
+                APIClient()
+                .post(
+                    "/user/login/",
+                    {"email": "ann@example.com", "password": "wrong"},
+                    format="json",
+                    HTTP_AUTHORIZATION=f"Basic {credentials}",
+                )
+                .status_code
+                for _ in range(4)
+            ]
+        self.assertEqual(statuses, [200, 200, 429, 429])
+        # Only the two logins let through check a password.
+        self.assertEqual(encode.call_count, 2)
+
+    def test_busy_process_sheds_logins(self):
+        slots = UserLoginAPIView._slots
+        acquired = 0
+        while slots.acquire(blocking=False):
+            acquired += 1
+        try:
+            response = self.login("ann@example.com")
+        finally:
+            for _ in range(acquired):
+                slots.release()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(throttle_stats(), {"login_shed": 1})
@@ -1,7 +1,7 @@
 from django.contrib.auth import login, logout
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.sites.shortcuts import get_current_site
-from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
 from django.shortcuts import redirect
 from django.template.loader import render_to_string
 from django.utils.encoding import force_bytes
@@ -13,6 +13,10 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from cinecraze_server.throttling import AccountThrottle, IPThrottle, LoadSheddingMixin
+from outbox.mail import enqueue_email
+
+from .authentication import cache_token
 from .models import CustomUser
 from .serializers import (
     ChangePasswordSerializer,
@@ -25,34 +29,42 @@ from .serializers import (
 class UserViewSet(viewsets.ModelViewSet):
     queryset = CustomUser.objects.all()
     serializer_class = UserSerializer
+    ordering = ("-id",)
 
     def update(self, request, *args, **kwargs):
         kwargs["partial"] = True
         return super().update(request, *args, **kwargs)
 
 
-class UserRegistrationAPIView(APIView):
+class UserRegistrationAPIView(LoadSheddingMixin, APIView):
     serializer_class = UserCreateSerializer
+    # DRF authenticates before throttling and BasicAuthentication hashes the
+    # password it is sent, so these password endpoints take no credentials.
+    authentication_classes = []
+    throttle_classes = [IPThrottle, AccountThrottle]
+    throttle_scope = "register"
+    throttle_account_field = "email"
 
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
 
         if serializer.is_valid():
-            user = serializer.save()
-            token = default_token_generator.make_token(user)
-            # print("Token: " + str(token))
-            uid = urlsafe_base64_encode(force_bytes(user.pk))
-            # print("UID: " + str(uid))
-            domain = get_current_site(self.request).domain
-            verification_link = f"https://{domain}/user/activate/{uid}/{token}"
-            email_subject = "Confirm Your Account"
-            email_body = render_to_string(
-                "user_account/confirmation_mail.html",
-                {"verification_link": verification_link},
-            )
-            email = EmailMultiAlternatives(email_subject, "", to=[user.email])
-            email.attach_alternative(email_body, "text/html")
-            email.send()
+            # The confirmation email is queued with the user, so it is only
+            # sent if the account is created.
+            with transaction.atomic():
+                user = serializer.save()
+                token = default_token_generator.make_token(user)
+                # print("Token: " + str(token))
+                uid = urlsafe_base64_encode(force_bytes(user.pk))
+                # print("UID: " + str(uid))
+                domain = get_current_site(self.request).domain
+                verification_link = f"https://{domain}/user/activate/{uid}/{token}"
+                email_subject = "Confirm Your Account"
+                email_body = render_to_string(
+                    "user_account/confirmation_mail.html",
+                    {"verification_link": verification_link},
+                )
+                enqueue_email(email_subject, [user.email], html_body=email_body)
             return Response(
                 {
                     "message": "Check Your Mail For Confirmation",
@@ -77,7 +89,12 @@ def activate(request, uid64, token):
         return redirect("https://cinecraze-client.vercel.app/signup.html")
 
 
-class UserLoginAPIView(APIView):
+class UserLoginAPIView(LoadSheddingMixin, APIView):
+    authentication_classes = []
+    throttle_classes = [IPThrottle, AccountThrottle]
+    throttle_scope = "login"
+    throttle_account_field = "email"
+
     def post(self, request):
         serializer = LoginSerializer(data=self.request.data)
         if serializer.is_valid():
@@ -88,6 +105,8 @@ class UserLoginAPIView(APIView):
             if user:
                 token, _ = Token.objects.get_or_create(user=user)
                 login(request, user)
+                # The client's next requests authenticate with this token.
+                cache_token(token.key, user)
                 return Response(
                     {
                         "message": "User logged in successfully",
@@ -102,8 +121,12 @@ class UserLoginAPIView(APIView):
         return Response(serializer.errors)
 
 
-class ChangePasswordView(APIView):
+class ChangePasswordView(LoadSheddingMixin, APIView):
     # permission_classes = [IsAuthenticated]
+    authentication_classes = []
+    throttle_classes = [IPThrottle, AccountThrottle]
+    throttle_scope = "change_password"
+    throttle_account_field = "user_id"
 
     def post(self, request):
         serializer = ChangePasswordSerializer(data=request.data)